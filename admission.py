@@ -0,0 +1,258 @@
+"""
+Admission Control
+LLM 호출 앞단의 동시 실행 제한, 우선순위 대기열, 클라이언트별 토큰 버킷, 마감 시간 기반 부하 차단
+"""
+
+import os
+import math
+import time
+import heapq
+import sqlite3
+import tempfile
+import itertools
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, Dict, Tuple, Callable, Any
+
+from starlette.concurrency import run_in_threadpool
+
+from profiling import span
+
+
+# 워커별 동시 LLM 호출 수와 대기열 길이
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+LLM_QUEUE_SIZE = int(os.getenv("LLM_QUEUE_SIZE", "32"))
+
+# 클라이언트별 요청 허용량 (분당 요청 수, 순간 최대 요청 수) - 모든 워커 합산 기준
+CLIENT_RATE_PER_MINUTE = float(os.getenv("CLIENT_RATE_PER_MINUTE", "30"))
+CLIENT_BURST = int(os.getenv("CLIENT_BURST", "10"))
+# 같은 호스트의 모든 워커 프로세스가 공유하는 토큰 버킷 저장 파일
+RATE_LIMIT_DB_PATH = os.getenv("RATE_LIMIT_DB_PATH", os.path.join(tempfile.gettempdir(), "sql_rate_limits.sqlite3"))
+
+# 앞단 신뢰 프록시 수 - X-Forwarded-For 끝에서 이 번째 주소를 클라이언트로 사용 (0이면 헤더 무시)
+# 클라이언트가 보낸 앞쪽 값은 위조할 수 있으므로 프록시가 덧붙인 값만 신뢰
+TRUSTED_PROXY_COUNT = int(os.getenv("TRUSTED_PROXY_COUNT", "1"))
+
+# 실측 전 LLM 호출 1회 예상 소요 시간 (초)
+LLM_EXPECTED_SECONDS = float(os.getenv("LLM_EXPECTED_SECONDS", "8"))
+
+# 우선순위 레인 (숫자가 작을수록 먼저 처리)
+LANE_INTERACTIVE = 0  # /api/generate-sql
+LANE_SAMPLES = 1      # /api/generate-samples
+LANE_BATCH = 2        # 일괄 작업
+
+# 레인별 요청 마감 시간 (초) - 이 안에 처리될 수 없으면 대기하지 않고 즉시 거절
+LANE_DEADLINES = {
+    LANE_INTERACTIVE: float(os.getenv("INTERACTIVE_DEADLINE_SECONDS", "30")),
+    LANE_SAMPLES: float(os.getenv("SAMPLES_DEADLINE_SECONDS", "60")),
+    LANE_BATCH: float(os.getenv("BATCH_DEADLINE_SECONDS", "120")),
+}
+
+# 요청 처리 스레드의 (레인, 마감 시각) - LLM 호출 지점에서 참조
+_current_request: ContextVar[Optional[Tuple[int, float]]] = ContextVar("admission_request", default=None)
+
+
+class AdmissionRejected(Exception):
+    """처리 불가 요청 (429: 클라이언트 허용량 초과, 503: 대기열 포화/마감 초과)"""
+
+    def __init__(self, status_code: int, detail: str, retry_after: float):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class TokenBucket:
+    """초당 rate개씩 채워지고 최대 capacity개까지 쌓이는 토큰 버킷"""
+
+    __slots__ = ("capacity", "rate", "tokens", "updated")
+
+    def __init__(self, capacity: float, rate: float, tokens: Optional[float] = None, updated: Optional[float] = None):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity if tokens is None else tokens
+        # 워커 간에 공유되므로 단조 시계가 아닌 벽시계 기준
+        self.updated = time.time() if updated is None else updated
+
+    def take(self) -> float:
+        """토큰 1개 사용. 성공하면 0, 부족하면 다음 토큰까지 남은 초"""
+        now = max(time.time(), self.updated)
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class _Waiter:
+    __slots__ = ("lane", "deadline", "granted", "cancelled")
+
+    def __init__(self, lane: int, deadline: float):
+        self.lane = lane
+        self.deadline = deadline
+        self.granted = False
+        self.cancelled = False
+
+
+class AdmissionController:
+    """LLM 호출 슬롯을 우선순위 순으로 배분하고, 마감 안에 처리할 수 없는 요청은 빠르게 거절"""
+
+    def __init__(self, max_concurrency: int = LLM_MAX_CONCURRENCY, queue_size: int = LLM_QUEUE_SIZE,
+                 rate_per_minute: float = CLIENT_RATE_PER_MINUTE, burst: int = CLIENT_BURST,
+                 rate_limit_path: str = RATE_LIMIT_DB_PATH):
+        self.max_concurrency = max_concurrency
+        self.queue_size = queue_size
+        self.rate_per_second = rate_per_minute / 60
+        self.burst = burst
+
+        self.active = 0
+        self.waiting = 0
+        self.service_seconds = LLM_EXPECTED_SECONDS  # 호출 소요 시간 이동 평균
+        self._heap: list = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+        # 워커마다 버킷을 두면 클라이언트 허용량이 워커 수만큼 늘어나므로 SQLite 파일로 공유
+        self.rate_limit_path = rate_limit_path
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_buckets ("
+                "client TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS rate_buckets_updated ON rate_buckets (updated)")
+        finally:
+            conn.close()
+
+    # ===== Per-client rate limit =====
+
+    def _connect(self) -> sqlite3.Connection:
+        # fork 이후에도 안전하도록 연결은 작업마다 새로 열고 닫음
+        conn = sqlite3.connect(self.rate_limit_path, timeout=5, isolation_level=None)
+        # 버킷 상태는 유실되어도 가득 찬 버킷으로 돌아갈 뿐이므로 fsync 생략
+        conn.execute("PRAGMA synchronous=OFF")
+        return conn
+
+    def check_rate(self, client_id: str):
+        """클라이언트 토큰 버킷에서 1개 사용 (부족하면 429, 모든 워커가 같은 버킷 사용)"""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT tokens, updated FROM rate_buckets WHERE client = ?", (client_id,)).fetchone()
+            bucket = TokenBucket(self.burst, self.rate_per_second, *(row or ()))
+            wait = bucket.take()
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_buckets (client, tokens, updated) VALUES (?, ?, ?)",
+                (client_id, bucket.tokens, bucket.updated)
+            )
+            # 다시 가득 찼을 시간이 지난 버킷은 새 버킷과 같으므로 정리
+            conn.execute("DELETE FROM rate_buckets WHERE updated < ?", (bucket.updated - self.burst / self.rate_per_second,))
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            # 저장소 오류로 서비스를 막지 않음 (제한 없이 통과)
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            print(f"Rate limit store error: {e}")
+            return
+        finally:
+            conn.close()
+        if wait > 0:
+            raise AdmissionRejected(429, "요청이 너무 많습니다. 잠시 후 다시 시도해주세요.", wait)
+
+    # ===== Request context =====
+
+    async def run(self, lane: int, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """레인과 마감 시각을 지정하여 동기 함수를 스레드풀에서 실행 (이벤트 루프 차단 방지)"""
+        deadline = time.monotonic() + LANE_DEADLINES[lane]
+        return await run_in_threadpool(self._call, lane, deadline, func, *args, **kwargs)
+
+    def _call(self, lane: int, deadline: float, func: Callable[..., Any], *args, **kwargs) -> Any:
+        token = _current_request.set((lane, deadline))
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _current_request.reset(token)
+
+    # ===== LLM call slots =====
+
+    @contextmanager
+    def slot(self):
+        """LLM 호출 1회 동안 슬롯 점유 (현재 요청의 레인/마감 기준, 요청 밖에서는 일괄 작업으로 취급)"""
+        lane, deadline = _current_request.get() or (LANE_BATCH, time.monotonic() + LANE_DEADLINES[LANE_BATCH])
+        with span("admission_wait"):
+            self._acquire(lane, deadline)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(time.monotonic() - started)
+
+    def _acquire(self, lane: int, deadline: float):
+        with self._cond:
+            if self.active < self.max_concurrency and self.waiting == 0:
+                self.active += 1
+                return
+
+            # 낮은 우선순위 레인은 대기열 절반까지만 사용 (대화형 요청 자리 확보)
+            limit = self.queue_size if lane == LANE_INTERACTIVE else self.queue_size // 2
+            estimated_wait = self._estimated_wait(lane)
+            if self.waiting >= limit:
+                raise AdmissionRejected(503, "서버가 혼잡합니다. 잠시 후 다시 시도해주세요.", estimated_wait)
+            if time.monotonic() + estimated_wait + self.service_seconds > deadline:
+                raise AdmissionRejected(503, "요청 마감 시간 안에 처리할 수 없습니다. 잠시 후 다시 시도해주세요.", estimated_wait)
+
+            waiter = _Waiter(lane, deadline)
+            heapq.heappush(self._heap, (lane, next(self._seq), waiter))
+            self.waiting += 1
+            while not waiter.granted:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    waiter.cancelled = True
+                    self.waiting -= 1
+                    raise AdmissionRejected(503, "대기 중 요청 마감 시간이 지났습니다.", self._estimated_wait(lane))
+                self._cond.wait(remaining)
+
+    def _release(self, elapsed: float):
+        with self._cond:
+            self.service_seconds = self.service_seconds * 0.8 + elapsed * 0.2
+            self.active -= 1
+            while self._heap and self.active < self.max_concurrency:
+                _, _, waiter = heapq.heappop(self._heap)
+                if waiter.cancelled:
+                    continue
+                waiter.granted = True
+                self.waiting -= 1
+                self.active += 1
+            self._cond.notify_all()
+
+    def _estimated_wait(self, lane: int) -> float:
+        """같거나 높은 우선순위로 앞에 대기 중인 호출이 모두 끝날 때까지의 예상 시간"""
+        ahead = sum(1 for l, _, w in self._heap if l <= lane and not w.cancelled)
+        return (ahead // self.max_concurrency + 1) * self.service_seconds
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "active": self.active,
+                "waiting": self.waiting,
+                "max_concurrency": self.max_concurrency,
+                "queue_size": self.queue_size,
+                "avg_llm_seconds": round(self.service_seconds, 2)
+            }
+
+
+def client_id(request, trusted_proxies: int = TRUSTED_PROXY_COUNT) -> str:
+    """요청자 식별 (신뢰 프록시가 X-Forwarded-For에 덧붙인 주소, 없으면 연결 주소)"""
+    forwarded = request.headers.get("x-forwarded-for")
+    if forwarded and trusted_proxies > 0:
+        hops = [hop.strip() for hop in forwarded.split(",") if hop.strip()]
+        if len(hops) >= trusted_proxies:
+            return hops[-trusted_proxies]
+    return request.client.host if request.client else "unknown"
+
+
+# 싱글톤 인스턴스
+admission = AdmissionController()
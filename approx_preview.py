@@ -0,0 +1,208 @@
+"""
+Approximate Preview
+대용량 테이블 미리보기용 표본 실행: 가장 큰 기본 테이블을 표본 스캔으로 바꾸고 COUNT/SUM 결과를 배율로 보정
+"""
+
+import os
+from decimal import Decimal, InvalidOperation
+from typing import Optional, Dict, Any, List, Tuple
+
+import sqlglot
+from sqlglot import exp
+from sqlglot.errors import ParseError
+
+from sql_validator import DIALECTS
+
+
+APPROX_SAMPLE_PERCENT = float(os.getenv("APPROX_SAMPLE_PERCENT", "1"))
+# 예상 행 수가 이보다 작은 테이블만 참조하면 표본 없이 그대로 실행
+APPROX_MIN_ROWS = int(os.getenv("APPROX_MIN_ROWS", "100000"))
+
+# 값에 배율을 곱해도 결과가 같은 래퍼 (ROUND(SUM(x) * k) 등 산술은 제외)
+SCALE_PRESERVING = (exp.Round, exp.Coalesce, exp.Cast, exp.TryCast, exp.Paren)
+COMPARISONS = (exp.EQ, exp.NEQ, exp.GT, exp.GTE, exp.LT, exp.LTE, exp.Between)
+
+
+class ApproximatePreview:
+    """SQL을 표본 스캔으로 재작성하고 결과의 합계/건수를 전체 규모로 환산"""
+
+    def rewrite(self, sql: str, db_type: str, percent: float, table_rows: Dict[str, Optional[int]]) -> Dict[str, Any]:
+        """
+        PostgreSQL은 TABLESAMPLE SYSTEM(p), MySQL은 RAND() 필터 서브쿼리로 치환.
+        조인 시 표본이 곱해지지 않도록 가장 큰 테이블 하나만 표본 추출 (FK로 연결된 차원 테이블은 전체 사용)
+        """
+        db_type = (db_type or "").lower()
+        if db_type not in ("postgresql", "mysql"):
+            return {"success": False, "error": f"근사 미리보기를 지원하지 않는 DB 타입: {db_type}"}
+        if not 0 < percent <= 100:
+            return {"success": False, "error": "표본 비율은 0 초과 100 이하여야 합니다."}
+
+        try:
+            statements = [s for s in sqlglot.parse(sql, read=DIALECTS[db_type]) if s is not None]
+        except ParseError as e:
+            return {"success": False, "error": f"SQL 구문 분석 실패: {str(e).splitlines()[0]}"}
+        if len(statements) != 1 or not isinstance(statements[0], (exp.Select, exp.Union)):
+            return {"success": False, "error": "근사 미리보기는 단일 SELECT 쿼리만 지원합니다."}
+        statement = statements[0]
+
+        target = self._pick_table(statement, table_rows)
+        if target is None:
+            return {"success": True, "sql": sql, "approximate": False,
+                    "notes": ["행 수 통계가 있는 대용량 테이블이 없어 전체 데이터로 실행했습니다."]}
+        name, rows = target
+
+        table = self._sample_reference(statement, name)
+        if table is None:
+            # 서브쿼리 등에서도 표본을 쓰면 해당 행이 p²로 추출되어 1/p 환산이 편향됨
+            return {"success": False, "error": f"{name} 테이블이 여러 번 참조되어 근사 실행할 수 없습니다. 전체 실행을 사용하세요."}
+
+        if db_type == "postgresql":
+            table.set("sample", exp.TableSample(method=exp.var("SYSTEM"), percent=exp.Literal.number(percent)))
+        else:
+            # MySQL은 TABLESAMPLE이 없어 행 단위 필터로 근사 (스캔은 남지만 조인/집계 대상이 줄어듦)
+            sampled = (
+                exp.select("*")
+                .from_(exp.table_(table.name, db=table.db or None))
+                .where(exp.LT(this=exp.Anonymous(this="RAND"), expression=exp.Literal.number(percent / 100)))
+                .subquery(table.alias_or_name)
+            )
+            table.replace(sampled)
+
+        if self._filters_on_aggregate(statement):
+            # 표본의 COUNT/SUM은 약 p%로 줄어 "HAVING COUNT(*) > 10" 같은 조건이 다른 그룹을 남김
+            return {"success": False, "error": "집계 결과를 상수와 비교하는 조건이 있어 근사 실행할 수 없습니다. 전체 실행을 사용하세요."}
+
+        positions, unscaled = self._scaled_positions(statement)
+        notes = [f"{name} 테이블의 약 {percent:g}% 표본으로 실행한 근사 결과입니다.", f"{name} 예상 행 수: 약 {rows:,}"]
+        if unscaled:
+            notes.append(f"다음 컬럼은 표본 기준 값 그대로입니다 (전체 규모로 환산하지 않음): {', '.join(unscaled)}")
+
+        return {
+            "success": True,
+            "sql": statement.sql(dialect=DIALECTS[db_type]),
+            "approximate": True,
+            "sampled_table": name,
+            "scaled_positions": positions,
+            "notes": notes
+        }
+
+    def scale(self, result: Dict[str, Any], rewrite: Dict[str, Any], percent: float) -> Dict[str, Any]:
+        """COUNT/SUM 컬럼 값을 표본 비율의 역수만큼 곱해 전체 추정치로 변환"""
+        factor = 100 / percent
+        columns = result.get("columns", [])
+        scaled = [columns[i] for i in rewrite.get("scaled_positions", []) if i < len(columns)]
+        for row in result.get("data", []):
+            for column in scaled:
+                value = row.get(column)
+                if isinstance(value, bool) or value is None:
+                    continue
+                if isinstance(value, int):
+                    row[column] = round(value * factor)
+                elif isinstance(value, float):
+                    row[column] = value * factor
+                else:
+                    # NUMERIC 합계는 문자열로 직렬화되어 옴
+                    try:
+                        row[column] = str(Decimal(value) * Decimal(str(factor)))
+                    except InvalidOperation:
+                        continue
+
+        result.update({
+            "approximate": True,
+            "sample_percent": percent,
+            "scale_factor": factor,
+            "scaled_columns": scaled
+        })
+        return result
+
+    def _base_tables(self, statement: exp.Expression) -> List[exp.Table]:
+        cte_names = {cte.alias_or_name.lower() for cte in statement.find_all(exp.CTE)}
+        return [
+            t for t in statement.find_all(exp.Table)
+            # 테이블 함수, CTE 참조, 이미 표본 추출된 테이블 제외
+            if isinstance(t.this, exp.Identifier) and t.name.lower() not in cte_names and not t.args.get("sample")
+        ]
+
+    def _pick_table(self, statement: exp.Expression, table_rows: Dict[str, Optional[int]]) -> Optional[tuple]:
+        """예상 행 수가 가장 큰 기본 테이블 (통계가 없거나 APPROX_MIN_ROWS 미만이면 None)"""
+        known = [(table_rows.get(self._key(t)), self._key(t)) for t in self._base_tables(statement)]
+        known = [(rows, name) for rows, name in known if rows is not None]
+        if not known:
+            return None
+        rows, name = max(known)
+        return (name, rows) if rows >= APPROX_MIN_ROWS else None
+
+    def _sample_reference(self, statement: exp.Expression, name: str) -> Optional[exp.Table]:
+        """
+        표본을 적용할 참조 하나. 참조가 하나뿐이면 그 참조, 여러 개면 최상위 FROM/JOIN의 참조
+        (IN/상관 서브쿼리는 전체 테이블을 보므로 바깥 행 단위 표본이 편향되지 않음). 고를 수 없으면 None
+        """
+        references = [t for t in self._base_tables(statement) if self._key(t) == name]
+        if len(references) == 1:
+            return references[0]
+        if not isinstance(statement, exp.Select) or not statement.args.get("from"):
+            return None
+        outer = [statement.args["from"].this] + [join.this for join in statement.args.get("joins") or []]
+        outer = [t for t in references if any(t is o for o in outer)]
+        return outer[0] if len(outer) == 1 else None
+
+    def _key(self, table: exp.Table) -> str:
+        return f"{table.db}.{table.name}".lower() if table.db else table.name.lower()
+
+    def _scaled_positions(self, statement: exp.Expression) -> Tuple[List[int], List[str]]:
+        """
+        최상위 SELECT에서 표본 비율로 환산할 컬럼 위치 (COUNT/SUM, ROUND/COALESCE/CAST로 감싼 경우 포함)와
+        COUNT/SUM이 들어 있지만 환산할 수 없는 컬럼 이름 (COUNT DISTINCT, SUM(x) * 100 등)
+        """
+        if not isinstance(statement, exp.Select):
+            return [], []
+        selects = statement.selects
+        if any(isinstance(s, exp.Star) or (isinstance(s, exp.Column) and isinstance(s.this, exp.Star)) for s in selects):
+            return [], []
+        positions, unscaled = [], []
+        for i, select in enumerate(selects):
+            expression = select.unalias()
+            while isinstance(expression, SCALE_PRESERVING):
+                expression = expression.this
+            if isinstance(expression, exp.Sum) or (
+                isinstance(expression, exp.Count) and not isinstance(expression.this, exp.Distinct)
+            ):
+                positions.append(i)
+            elif select.find(exp.Sum, exp.Count):
+                unscaled.append(select.alias_or_name or select.sql())
+        return positions, unscaled
+
+    def _filters_on_aggregate(self, statement: exp.Expression) -> bool:
+        """
+        HAVING에서 COUNT/SUM을 집계가 아닌 값과 비교하거나, WHERE에서 COUNT/SUM
+        (서브쿼리 집계 컬럼 포함)을 상수와 비교하는지
+        """
+        # 서브쿼리/CTE에서 COUNT/SUM에 붙인 별칭 ("FROM (SELECT COUNT(*) AS c ...) t WHERE t.c > 10")
+        inner_aliases = {
+            select.alias.lower()
+            for query in statement.find_all(exp.Select) if query is not statement
+            for select in query.selects
+            if select.alias and select.find(exp.Sum, exp.Count)
+        }
+
+        def aggregated(side: exp.Expression) -> bool:
+            return side.find(exp.Sum, exp.Count) is not None or any(
+                column.name.lower() in inner_aliases for column in side.find_all(exp.Column)
+            )
+
+        for clause in statement.find_all(exp.Having, exp.Where):
+            for comparison in clause.find_all(*COMPARISONS):
+                sides = [comparison.this] + [comparison.args.get(k) for k in ("expression", "low", "high")]
+                sides = [side for side in sides if side is not None]
+                if not any(aggregated(side) for side in sides):
+                    continue
+                others = [side for side in sides if not aggregated(side)]
+                if isinstance(clause, exp.Having) and others:
+                    return True
+                if any(side.find(exp.Column, exp.Subquery) is None for side in others):
+                    return True
+        return False
+
+
+# 싱글톤 인스턴스
+approx_preview = ApproximatePreview()
@@ -0,0 +1,118 @@
+"""
+Catalog Benchmark
+중첩 dict 메타데이터와 슬롯 기반 SchemaCatalog의 메모리 사용량 및 조회 시간 비교
+
+사용법: python benchmarks/bench_catalog.py [테이블 수] [테이블당 컬럼 수]
+"""
+
+import os
+import sys
+import random
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from schema_catalog import SchemaCatalog, TableInfo  # noqa: E402
+
+
+COLUMN_TYPES = ("INTEGER", "BIGINT", "VARCHAR(255)", "TEXT", "TIMESTAMP", "NUMERIC(12,2)", "BOOLEAN")
+
+
+def build_dict_metadata(table_count: int, column_count: int) -> dict:
+    """추출 결과와 같은 형태의 합성 메타데이터 (각 dict가 키 문자열을 따로 보유)"""
+    rng = random.Random(42)
+    tables = []
+    for t in range(table_count):
+        table_name = f"table_{t:05d}"
+        columns = [{
+            "column_name": "id", "data_type": "INTEGER", "nullable": False,
+            "description": "고유 ID", "primary_key": True,
+            "stats": {"distinct_estimate": 10000, "null_fraction": 0.0}
+        }]
+        for c in range(1, column_count):
+            col = {
+                "column_name": f"column_{c:03d}",
+                "data_type": rng.choice(COLUMN_TYPES),
+                "nullable": True,
+                "description": f"{table_name}의 {c}번째 컬럼",
+                "primary_key": False,
+                "stats": {"distinct_estimate": rng.randint(1, 10000), "null_fraction": round(rng.random(), 3)}
+            }
+            if c == 1 and t > 0:
+                col["foreign_key"] = {"ref_table": f"table_{rng.randrange(t):05d}", "ref_column": "id"}
+            columns.append(col)
+        tables.append({
+            "table_name": table_name,
+            "description": f"합성 테이블 {t}",
+            "estimated_rows": rng.randint(0, 10_000_000),
+            "indexes": [{"name": f"{table_name}_pkey", "columns": ["id"], "unique": True, "primary_key": True}],
+            "columns": columns
+        })
+    return {
+        "db_type": "PostgreSQL",
+        "db_version": "16",
+        "schema_summary": {"tables": tables, "relationships": []},
+        "constraints": {}
+    }
+
+
+def measure(label: str, build):
+    tracemalloc.start()
+    start = time.perf_counter()
+    value = build()
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<32} {current / 1024 / 1024:>9.1f} MB {elapsed * 1000:>10.1f} ms")
+    return value
+
+
+def dict_lookup(metadata: dict, table_name: str, column_name: str):
+    # 기존 방식: 테이블 목록과 컬럼 목록을 선형 탐색
+    for table in metadata["schema_summary"]["tables"]:
+        if table["table_name"] == table_name:
+            for col in table["columns"]:
+                if col["column_name"] == column_name:
+                    return col
+    return None
+
+
+def catalog_lookup(catalog: SchemaCatalog, table_name: str, column_name: str):
+    table = catalog.get_table(table_name)
+    return table.column(column_name) if table else None
+
+
+def main():
+    table_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    column_count = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    print(f"테이블 {table_count:,}개 x 컬럼 {column_count}개")
+    print(f"{'':<32} {'memory':>12} {'build':>13}")
+
+    # dict 형태는 JSON 역직렬화 결과처럼 문자열이 각각 할당되도록 생성
+    metadata = measure("dict (schema_summary)", lambda: build_dict_metadata(table_count, column_count))
+    source = build_dict_metadata(table_count, column_count)
+    catalog = measure("SchemaCatalog (__slots__)", lambda: SchemaCatalog(
+        (TableInfo.from_dict(table) for table in source["schema_summary"]["tables"]), "PostgreSQL", "16"
+    ))
+    del source
+
+    rng = random.Random(7)
+    probes = [(f"table_{rng.randrange(table_count):05d}", f"column_{rng.randrange(1, column_count):03d}")
+              for _ in range(2_000)]
+
+    print(f"\n{'lookup (2,000회)':<32} {'total':>12} {'per call':>13}")
+    for label, lookup, target in (("dict 선형 탐색", dict_lookup, metadata),
+                                  ("SchemaCatalog 해시 조회", catalog_lookup, catalog)):
+        start = time.perf_counter()
+        for table_name, column_name in probes:
+            assert lookup(target, table_name, column_name) is not None
+        elapsed = time.perf_counter() - start
+        print(f"{label:<32} {elapsed * 1000:>9.1f} ms {elapsed / len(probes) * 1e6:>10.2f} us")
+
+    measure("to_dict() (API 응답 시에만)", catalog.to_dict)
+
+
+if __name__ == "__main__":
+    main()
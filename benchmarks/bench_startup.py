@@ -0,0 +1,87 @@
+"""
+Startup Benchmark
+새 인터프리터에서 `import main`까지 걸리는 콜드 스타트 시간과 공급자 SDK 지연 로딩 비용 측정
+
+사용법: python benchmarks/bench_startup.py [반복 횟수]
+"""
+
+import os
+import sys
+import statistics
+import subprocess
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_MAIN = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+
+# 첫 요청에서 클라이언트를 만들 때의 비용 (네트워크 호출 없음, 더미 키 사용)
+FIRST_USE = {
+    "openai": (
+        "import sql_generator, time; t = time.perf_counter(); "
+        "sql_generator.sql_generator.openai_client; print(time.perf_counter() - t)"
+    ),
+    "google": (
+        "import sql_generator, time; t = time.perf_counter(); "
+        "sql_generator.sql_generator.gemini_model; print(time.perf_counter() - t)"
+    ),
+}
+
+
+def run_python(code: str, extra_env: dict = None, flags: tuple = ()) -> subprocess.CompletedProcess:
+    env = dict(os.environ, **(extra_env or {}))
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code], cwd=ROOT, env=env,
+        capture_output=True, text=True, check=True
+    )
+
+
+def timed(code: str, runs: int, extra_env: dict = None) -> list:
+    return [float(run_python(code, extra_env).stdout.strip().splitlines()[-1]) for _ in range(runs)]
+
+
+def report(label: str, samples: list):
+    print(f"{label:<28} median {statistics.median(samples) * 1000:>8.1f} ms   "
+          f"min {min(samples) * 1000:>8.1f} ms   max {max(samples) * 1000:>8.1f} ms")
+
+
+def top_imports(limit: int = 12):
+    """-X importtime 결과에서 누적 시간이 큰 모듈"""
+    stderr = run_python("import main", flags=("-X", "importtime")).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        try:
+            rows.append((int(cumulative), name.rstrip()))
+        except ValueError:
+            continue  # 헤더 줄
+    rows.sort(reverse=True)
+    print(f"\n누적 import 시간 상위 {limit}개")
+    for cumulative, name in rows[:limit]:
+        print(f"  {cumulative / 1000:>8.1f} ms  {name}")
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    # 첫 실행은 .pyc 생성 비용이 섞이므로 버림
+    run_python("import main")
+
+    print(f"콜드 스타트 ({runs}회)")
+    report("import main", timed(IMPORT_MAIN, runs))
+
+    print("\n공급자 클라이언트 첫 사용 (지연 로딩)")
+    for provider, code in FIRST_USE.items():
+        key = "OPENAI_API_KEY" if provider == "openai" else "GEMINI_API_KEY"
+        try:
+            report(provider, timed(code, runs, {key: "bench-dummy-key"}))
+        except subprocess.CalledProcessError as e:
+            print(f"{provider:<28} 측정 실패: {e.stderr.strip().splitlines()[-1] if e.stderr else e}")
+
+    top_imports()
+
+
+if __name__ == "__main__":
+    main()
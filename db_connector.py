@@ -3,10 +3,30 @@ Database Connection Service
 실제 데이터베이스 연결 및 메타데이터 추출
 """
 
-from typing import Optional, Dict, Any, List
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple
 from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.exc import SQLAlchemyError
 import json
+import orjson
+import sqlglot
+from sqlglot import exp
+from sqlglot.errors import ParseError
+
+from rule_engine import rule_engine
+from schema_catalog import SchemaCatalog, TableInfo, register_catalog
+from profiling import span
+from sql_validator import DIALECTS
+from approx_preview import approx_preview, APPROX_SAMPLE_PERCENT
+
+
+# 워커별로 보관하는 테이블 상세 정보 최대 개수
+METADATA_DETAIL_CACHE_SIZE = int(os.getenv("METADATA_DETAIL_CACHE_SIZE", "256"))
+
+# 요청별로 상세 로딩할 관련 테이블 최대 개수 (전체가 이보다 적으면 모두 로딩)
+SCOPED_METADATA_MAX_TABLES = int(os.getenv("SCOPED_METADATA_MAX_TABLES", "30"))
 
 
 class DatabaseConnector:
@@ -20,7 +40,12 @@ class DatabaseConnector:
     def __init__(self):
         self.engine = None
         self.connection_info = None
-        self.metadata_cache = None
+        self.metadata_catalog: Optional[SchemaCatalog] = None  # 전체 메타데이터 (압축 카탈로그)
+        self.db_version = None
+        self.default_schema = None
+        self.table_listing_cache = None  # 전체 스키마 테이블 목록 (컬럼 제외)
+        self.table_detail_cache: "OrderedDict[Tuple[Optional[str], str], TableInfo]" = OrderedDict()
+        self._detail_lock = threading.Lock()
     
     def connect(self, db_type: str, host: str, port: int, database: str, 
                 user: str, password: str) -> Dict[str, Any]:
@@ -52,7 +77,8 @@ class DatabaseConnector:
                     result = conn.execute(text("SELECT VERSION()"))
                 version = result.scalar()
             
-            self.metadata_cache = None  # 연결 시 캐시 초기화
+            self.metadata_catalog = None  # 연결 시 캐시 초기화
+            self._reset_catalog_cache()
             
             self.connection_info = {
                 "db_type": db_type,
@@ -85,96 +111,261 @@ class DatabaseConnector:
             self.engine.dispose()
             self.engine = None
             self.connection_info = None
-            self.metadata_cache = None
+            self.metadata_catalog = None
+            self._reset_catalog_cache()
+    
+    def _reset_catalog_cache(self):
+        self.db_version = None
+        self.default_schema = None
+        self.table_listing_cache = None
+        with self._detail_lock:
+            self.table_detail_cache.clear()
     
     def extract_metadata(self) -> Dict[str, Any]:
         """데이터베이스 메타데이터 추출"""
         if not self.engine:
             return {"error": "데이터베이스에 연결되어 있지 않습니다."}
         
-        # 캐시된 메타데이터가 있으면 반환
-        if self.metadata_cache:
-            return self.metadata_cache
-
-        try:
-            inspector = inspect(self.engine)
-            tables_info = []
-            relationships = []
-            
-            # 모든 테이블 정보 추출
-            for table_name in inspector.get_table_names():
-                columns = []
-                pk_columns = set()
+        # 캐시된 카탈로그가 있으면 반환
+        if self.metadata_catalog is None:
+            try:
+                inspector = inspect(self.engine)
                 
-                # Primary Key 정보
-                pk_info = inspector.get_pk_constraint(table_name)
-                if pk_info:
-                    pk_columns = set(pk_info.get('constrained_columns', []))
+                # 통계 정보 (예상 행 수, 컬럼 선택도)
+                row_counts, column_stats = self._get_table_statistics()
                 
-                # Foreign Key 정보
-                fk_info = inspector.get_foreign_keys(table_name)
-                fk_map = {}
-                for fk in fk_info:
-                    for i, col in enumerate(fk.get('constrained_columns', [])):
-                        ref_cols = fk.get('referred_columns', [])
-                        fk_map[col] = {
-                            "ref_table": fk.get('referred_table'),
-                            "ref_column": ref_cols[i] if i < len(ref_cols) else None
-                        }
-                        relationships.append(
-                            f"{table_name}.{col} → {fk.get('referred_table')}.{ref_cols[i] if i < len(ref_cols) else '?'}"
-                        )
+                # 모든 테이블 정보 추출
+                tables_info = [
+                    self._extract_table_detail(inspector, table_name, None, row_counts, column_stats)
+                    for table_name in inspector.get_table_names()
+                ]
                 
-                # 컬럼 정보
-                for col in inspector.get_columns(table_name):
-                    col_info = {
-                        "column_name": col['name'],
-                        "data_type": str(col['type']),
-                        "nullable": col.get('nullable', True),
-                        "description": col.get('comment', ''),
-                        "primary_key": col['name'] in pk_columns
-                    }
-                    
-                    if col['name'] in fk_map:
-                        col_info["foreign_key"] = fk_map[col['name']]
-                    
-                    columns.append(col_info)
-                
-                # 테이블 코멘트
-                table_comment = inspector.get_table_comment(table_name)
+                # dict 대신 슬롯 객체 카탈로그로 보관 (dict 형태는 응답 시에만 생성)
+                self.metadata_catalog = self._build_catalog(tables_info, self._get_db_version())
                 
-                tables_info.append({
-                    "table_name": table_name,
-                    "description": table_comment.get('text', '') if table_comment else '',
-                    "columns": columns
-                })
-            
-            # 메타데이터 구성
-            db_type = self.connection_info.get('db_type', 'Unknown') if self.connection_info else 'Unknown'
-            
-            metadata = {
-                "db_type": db_type,
-                "db_version": self._get_db_version(),
-                "schema_summary": {
-                    "tables": tables_info,
-                    "relationships": relationships
-                },
-                "constraints": {
-                    "soft_delete_rule": None,
-                    "valid_status_values": [],
-                    "mandatory_filters": []
+            except SQLAlchemyError as e:
+                return {
+                    "success": False,
+                    "error": f"메타데이터 추출 실패: {str(e)}"
+                }
+            except Exception as e:
+                return {
+                    "success": False,
+                    "error": f"오류 발생: {str(e)}"
+                }
+        
+        return {
+            "success": True,
+            "catalog": self.metadata_catalog,
+            "table_count": len(self.metadata_catalog)
+        }
+    
+    def _build_catalog(self, tables_info: List[TableInfo], db_version: str) -> SchemaCatalog:
+        db_type = self.connection_info.get('db_type', 'Unknown') if self.connection_info else 'Unknown'
+        return SchemaCatalog(
+            tables_info,
+            db_type,
+            db_version,
+            constraints={
+                "soft_delete_rule": None,
+                "valid_status_values": [],
+                "mandatory_filters": []
+            }
+        )
+    
+    def _extract_table_detail(self, inspector, table_name: str, schema: Optional[str],
+                              row_counts: Dict[str, int],
+                              column_stats: Dict[Tuple[str, str], Dict[str, Any]]) -> TableInfo:
+        """단일 테이블의 컬럼/키/인덱스/코멘트 정보 추출 (관계는 FK 컬럼에서 파생)"""
+        display_name = self._qualified_name(schema, table_name)
+        columns = []
+        pk_columns = set()
+        
+        # Primary Key 정보
+        pk_info = inspector.get_pk_constraint(table_name, schema=schema)
+        if pk_info:
+            pk_columns = set(pk_info.get('constrained_columns', []))
+        
+        # Foreign Key 정보
+        fk_info = inspector.get_foreign_keys(table_name, schema=schema)
+        fk_map = {}
+        for fk in fk_info:
+            ref_table = self._qualified_name(fk.get('referred_schema'), fk.get('referred_table'))
+            for i, col in enumerate(fk.get('constrained_columns', [])):
+                ref_cols = fk.get('referred_columns', [])
+                fk_map[col] = {
+                    "ref_table": ref_table,
+                    "ref_column": ref_cols[i] if i < len(ref_cols) else None
                 }
+        
+        # 컬럼 정보
+        for col in inspector.get_columns(table_name, schema=schema):
+            col_info = {
+                "column_name": col['name'],
+                "data_type": str(col['type']),
+                "nullable": col.get('nullable', True),
+                "description": col.get('comment', ''),
+                "primary_key": col['name'] in pk_columns
             }
             
+            if col['name'] in fk_map:
+                col_info["foreign_key"] = fk_map[col['name']]
+            
+            if (table_name, col['name']) in column_stats:
+                col_info["stats"] = column_stats[(table_name, col['name'])]
+            
+            columns.append(col_info)
+        
+        # 인덱스 정보
+        indexes = []
+        if pk_columns:
+            indexes.append({
+                "name": pk_info.get('name') or f"{table_name}_pkey",
+                "columns": list(pk_info.get('constrained_columns', [])),
+                "unique": True,
+                "primary_key": True
+            })
+        for idx in inspector.get_indexes(table_name, schema=schema):
+            indexes.append({
+                "name": idx.get('name'),
+                "columns": [c for c in idx.get('column_names', []) if c],
+                "unique": bool(idx.get('unique', False))
+            })
+        
+        # 테이블 코멘트
+        table_comment = inspector.get_table_comment(table_name, schema=schema)
+        
+        return TableInfo.from_dict({
+            "table_name": display_name,
+            "description": table_comment.get('text', '') if table_comment else '',
+            "estimated_rows": row_counts.get(table_name),
+            "indexes": indexes,
+            "columns": columns
+        })
+    
+    def _qualified_name(self, schema: Optional[str], table_name: str) -> str:
+        """기본 스키마가 아닌 테이블은 schema.table 형태로 표시"""
+        if schema and schema != self.default_schema:
+            return f"{schema}.{table_name}"
+        return table_name
+    
+    def list_tables(self) -> Dict[str, Any]:
+        """전체 스키마의 테이블 이름/코멘트/예상 행 수만 가볍게 조회 (컬럼 정보 제외)"""
+        if not self.engine:
+            return {"success": False, "error": "데이터베이스에 연결되어 있지 않습니다."}
+        
+        if self.table_listing_cache:
+            return self.table_listing_cache
+        
+        db_type = self.connection_info.get('db_type', '').lower() if self.connection_info else ''
+        
+        try:
+            tables = []
+            with self.engine.connect() as conn:
+                if db_type == "postgresql":
+                    self.default_schema = conn.execute(text("SELECT current_schema()")).scalar()
+                    rows = conn.execute(text(
+                        "SELECT n.nspname, c.relname, obj_description(c.oid, 'pg_class'), c.reltuples "
+                        "FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+                        "WHERE c.relkind IN ('r', 'p') AND NOT c.relispartition "
+                        "AND n.nspname NOT IN ('pg_catalog', 'information_schema') "
+                        "AND n.nspname NOT LIKE 'pg\\_%' "
+                        "ORDER BY n.nspname, c.relname"
+                    ))
+                elif db_type == "mysql":
+                    self.default_schema = conn.execute(text("SELECT DATABASE()")).scalar()
+                    rows = conn.execute(text(
+                        "SELECT TABLE_SCHEMA, TABLE_NAME, TABLE_COMMENT, TABLE_ROWS FROM information_schema.TABLES "
+                        "WHERE TABLE_TYPE = 'BASE TABLE' "
+                        "AND TABLE_SCHEMA NOT IN ('mysql', 'information_schema', 'performance_schema', 'sys') "
+                        "ORDER BY TABLE_SCHEMA, TABLE_NAME"
+                    ))
+                else:
+                    inspector = inspect(self.engine)
+                    self.default_schema = inspector.default_schema_name
+                    rows = [
+                        (schema, table_name, None, None)
+                        for schema in inspector.get_schema_names()
+                        for table_name in inspector.get_table_names(schema=schema)
+                    ]
+                
+                for schema, table_name, comment, estimated_rows in rows:
+                    tables.append({
+                        "schema": schema,
+                        "name": table_name,
+                        "table_name": self._qualified_name(schema, table_name),
+                        "description": comment or '',
+                        "estimated_rows": int(estimated_rows) if estimated_rows is not None and estimated_rows >= 0 else None
+                    })
+            
             result = {
                 "success": True,
-                "metadata": metadata,
-                "table_count": len(tables_info)
+                "default_schema": self.default_schema,
+                "schemas": sorted({t["schema"] for t in tables if t["schema"]}),
+                "tables": tables,
+                "table_count": len(tables)
             }
-            
-            self.metadata_cache = result  # 결과 캐싱
+            self.table_listing_cache = result
             return result
             
+        except SQLAlchemyError as e:
+            return {
+                "success": False,
+                "error": f"테이블 목록 조회 실패: {str(e)}"
+            }
+    
+    def get_table_detail(self, schema: Optional[str], table_name: str) -> TableInfo:
+        """테이블 상세 정보 (워커별 LRU 캐시, 최대 METADATA_DETAIL_CACHE_SIZE개)"""
+        key = (schema, table_name)
+        with self._detail_lock:
+            cached = self.table_detail_cache.get(key)
+            if cached is not None:
+                self.table_detail_cache.move_to_end(key)
+                return cached
+        
+        row_counts, column_stats = self._get_table_statistics(schema=schema, table_name=table_name)
+        detail = self._extract_table_detail(inspect(self.engine), table_name, schema, row_counts, column_stats)
+        
+        with self._detail_lock:
+            self.table_detail_cache[key] = detail
+            self.table_detail_cache.move_to_end(key)
+            while len(self.table_detail_cache) > METADATA_DETAIL_CACHE_SIZE:
+                self.table_detail_cache.popitem(last=False)
+        return detail
+    
+    def build_scoped_metadata(self, user_request: str, max_tables: int = SCOPED_METADATA_MAX_TABLES) -> Dict[str, Any]:
+        """요청과 관련된 테이블(및 FK로 연결된 테이블)만 상세 로딩한 메타데이터"""
+        listing = self.list_tables()
+        if not listing.get("success"):
+            return listing
+        
+        listed = {t["table_name"]: t for t in listing["tables"]}
+        if len(listed) <= max_tables:
+            selected = list(listed)
+        else:
+            # 테이블명/코멘트 검색어 인덱스로 관련 테이블 선택 (목록 dict는 캐시되어 인덱스도 재사용)
+            selected = rule_engine.get_index(self._listing_as_metadata(listing)).rank_tables(user_request, max_tables)
+            if not selected:
+                selected = [t["table_name"] for t in listing["tables"] if t["schema"] == self.default_schema][:max_tables]
+        
+        try:
+            tables_info = []
+            loaded = set()
+            queue = list(selected)
+            # 선택 테이블의 FK 참조 테이블까지 (조인 경로 확보), 최대 2배까지 로딩
+            while queue and len(loaded) < max_tables * 2:
+                name = queue.pop(0)
+                if name in loaded or name not in listed:
+                    continue
+                entry = listed[name]
+                table_info = self.get_table_detail(entry["schema"], entry["name"])
+                loaded.add(name)
+                tables_info.append(table_info)
+                if name in selected:
+                    queue.extend(
+                        col.foreign_key[0] for col in table_info.columns
+                        if col.foreign_key and col.foreign_key[0] not in loaded
+                    )
         except SQLAlchemyError as e:
             return {
                 "success": False,
@@ -185,6 +376,116 @@ class DatabaseConnector:
                 "success": False,
                 "error": f"오류 발생: {str(e)}"
             }
+        
+        # 캐시된 TableInfo를 그대로 공유하는 카탈로그에서 프롬프트용 dict 생성
+        catalog = self._build_catalog(tables_info, self._get_cached_db_version())
+        metadata = catalog.to_dict()
+        register_catalog(metadata, catalog)
+        return {
+            "success": True,
+            "metadata": metadata,
+            "table_count": len(tables_info),
+            "total_table_count": listing["table_count"]
+        }
+    
+    def _listing_as_metadata(self, listing: Dict[str, Any]) -> Dict[str, Any]:
+        """테이블 목록을 검색어 인덱스용 메타데이터 형태로 변환 (목록 캐시와 함께 보관)"""
+        if "_as_metadata" not in listing:
+            listing["_as_metadata"] = {
+                "schema_summary": {
+                    "tables": [
+                        {"table_name": t["table_name"], "description": t["description"], "columns": []}
+                        for t in listing["tables"]
+                    ]
+                }
+            }
+        return listing["_as_metadata"]
+    
+    def get_metadata_payload(self) -> Optional[bytes]:
+        """캐시된 메타데이터를 JSON 바이트로 반환 (워커 메모리를 위해 인코딩 결과는 보관하지 않음)"""
+        if self.metadata_catalog is None:
+            return None
+        return orjson.dumps({
+            "success": True,
+            "metadata": self.metadata_catalog.to_dict(),
+            "table_count": len(self.metadata_catalog)
+        })
+    
+    def _get_table_statistics(self, schema: Optional[str] = None, table_name: Optional[str] = None) -> Tuple[Dict[str, int], Dict[Tuple[str, str], Dict[str, Any]]]:
+        """테이블 예상 행 수 및 컬럼 통계 조회 (pg_class/pg_stats, information_schema)"""
+        row_counts: Dict[str, int] = {}
+        column_stats: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        
+        db_type = self.connection_info.get('db_type', '').lower() if self.connection_info else ''
+        params = {"schema": schema, "table_name": table_name}
+        
+        try:
+            with self.engine.connect() as conn:
+                if db_type == "postgresql":
+                    schema_filter = "n.nspname = :schema" if schema else "n.nspname = current_schema()"
+                    table_filter = " AND c.relname = :table_name" if table_name else ""
+                    # reltuples는 ANALYZE/VACUUM 기준 추정치 (-1 또는 0이면 통계 없음)
+                    rows = conn.execute(text(
+                        "SELECT c.relname, c.reltuples FROM pg_class c "
+                        "JOIN pg_namespace n ON n.oid = c.relnamespace "
+                        f"WHERE {schema_filter} AND c.relkind IN ('r', 'p'){table_filter}"
+                    ), params)
+                    for name, reltuples in rows:
+                        if reltuples is not None and reltuples >= 0:
+                            row_counts[name] = int(reltuples)
+                    
+                    schema_filter = "schemaname = :schema" if schema else "schemaname = current_schema()"
+                    table_filter = " AND tablename = :table_name" if table_name else ""
+                    # n_distinct가 음수이면 전체 행 대비 비율
+                    rows = conn.execute(text(
+                        "SELECT tablename, attname, n_distinct, null_frac FROM pg_stats "
+                        f"WHERE {schema_filter}{table_filter}"
+                    ), params)
+                    for name, column_name, n_distinct, null_frac in rows:
+                        distinct = None
+                        if n_distinct is not None:
+                            if n_distinct < 0:
+                                total = row_counts.get(name)
+                                distinct = int(-n_distinct * total) if total else None
+                            else:
+                                distinct = int(n_distinct)
+                        column_stats[(name, column_name)] = {
+                            "distinct_estimate": distinct,
+                            "null_fraction": round(float(null_frac), 4) if null_frac is not None else None
+                        }
+                
+                elif db_type == "mysql":
+                    schema_filter = "TABLE_SCHEMA = :schema" if schema else "TABLE_SCHEMA = DATABASE()"
+                    table_filter = " AND TABLE_NAME = :table_name" if table_name else ""
+                    rows = conn.execute(text(
+                        "SELECT TABLE_NAME, TABLE_ROWS FROM information_schema.TABLES "
+                        f"WHERE {schema_filter} AND TABLE_TYPE = 'BASE TABLE'{table_filter}"
+                    ), params)
+                    for name, table_rows in rows:
+                        if table_rows is not None:
+                            row_counts[name] = int(table_rows)
+                    
+                    # 인덱스 컬럼에 대해서만 CARDINALITY 통계가 존재
+                    rows = conn.execute(text(
+                        "SELECT TABLE_NAME, COLUMN_NAME, MAX(CARDINALITY) FROM information_schema.STATISTICS "
+                        f"WHERE {schema_filter}{table_filter} GROUP BY TABLE_NAME, COLUMN_NAME"
+                    ), params)
+                    for name, column_name, cardinality in rows:
+                        column_stats[(name, column_name)] = {
+                            "distinct_estimate": int(cardinality) if cardinality is not None else None,
+                            "null_fraction": None
+                        }
+        except SQLAlchemyError as e:
+            # 통계는 부가 정보이므로 조회 실패 시 빈 값으로 진행
+            print(f"Statistics lookup failed: {e}")
+        
+        return row_counts, column_stats
+    
+    def _get_cached_db_version(self) -> str:
+        """요청마다 조회하지 않도록 연결 단위로 DB 버전 캐싱"""
+        if self.db_version is None:
+            self.db_version = self._get_db_version()
+        return self.db_version
     
     def _get_db_version(self) -> str:
         """DB 버전 조회"""
@@ -204,13 +505,30 @@ class DatabaseConnector:
         except:
             return "Unknown"
     
-    def test_query(self, sql: str, limit: int = 10) -> Dict[str, Any]:
-        """쿼리 실행"""
+    def test_query(self, sql: str, limit: int = 10, approximate: bool = False,
+                   sample_percent: Optional[float] = None) -> Dict[str, Any]:
+        """쿼리 실행 (approximate=True면 가장 큰 테이블을 표본 추출하여 근사 실행)"""
         if not self.engine:
             return {"success": False, "error": "데이터베이스에 연결되어 있지 않습니다."}
         
         # SQL 정리
         sql_trim = sql.strip().rstrip(';')
+        
+        rewrite = None
+        if approximate:
+            sample_percent = sample_percent or APPROX_SAMPLE_PERCENT
+            listing = self.list_tables()
+            table_rows = {}
+            for t in listing.get("tables", []) if listing.get("success") else []:
+                if t["schema"]:
+                    table_rows[f"{t['schema']}.{t['name']}".lower()] = t["estimated_rows"]
+                # 스키마 없이 쓴 이름은 기본 스키마 테이블만 가리킴
+                if not t["schema"] or t["schema"] == listing.get("default_schema"):
+                    table_rows[t["name"].lower()] = t["estimated_rows"]
+            rewrite = approx_preview.rewrite(sql_trim, self.connection_info.get('db_type', ''), sample_percent, table_rows)
+            if not rewrite["success"]:
+                return rewrite
+            sql_trim = rewrite["sql"]
         sql_upper = sql_trim.upper()
         
         # SELECT 쿼리인 경우에만 LIMIT 추가 시도
@@ -224,7 +542,7 @@ class DatabaseConnector:
             sql_to_run = sql_trim
         
         try:
-            with self.engine.connect() as conn:
+            with span("db"), self.engine.connect() as conn:
                 result = conn.execute(text(sql_to_run))
                 
                 # 결과가 있는 경우 (SELECT 등)
@@ -235,12 +553,20 @@ class DatabaseConnector:
                     for row in rows:
                         data.append({col: self._serialize_value(val) for col, val in zip(columns, row)})
                     
-                    return {
+                    response = {
                         "success": True,
                         "columns": columns,
                         "data": data,
                         "row_count": len(data)
                     }
+                    if rewrite is not None:
+                        response["notes"] = rewrite["notes"]
+                        if rewrite["approximate"]:
+                            approx_preview.scale(response, rewrite, sample_percent)
+                            response["executed_sql"] = sql_to_run
+                        else:
+                            response["approximate"] = False
+                    return response
                 else:
                     # 결과가 없는 경우 (INSERT, UPDATE, DELETE 등)
                     conn.commit() # 명시적 커밋
@@ -256,6 +582,90 @@ class DatabaseConnector:
                 "error": f"쿼리 실행 실패: {str(e)}"
             }
     
+    def explain_query(self, sql: str) -> Dict[str, Any]:
+        """EXPLAIN(ANALYZE 없이)으로 예상 비용, 행 수, 순차 스캔 추출"""
+        if not self.engine:
+            return {"success": False, "error": "데이터베이스에 연결되어 있지 않습니다."}
+        
+        db_type = self.connection_info.get('db_type', '').lower() if self.connection_info else ''
+        if db_type not in DIALECTS:
+            return {"success": False, "error": f"EXPLAIN을 지원하지 않는 DB 타입: {db_type}"}
+        
+        # 드라이버는 여러 문장을 모두 실행하므로 단일 SELECT/WITH 문일 때만 EXPLAIN
+        try:
+            statements = [s for s in sqlglot.parse(sql, read=DIALECTS[db_type]) if s is not None]
+        except ParseError as e:
+            return {"success": False, "error": f"SQL 구문 분석 실패: {str(e).splitlines()[0]}"}
+        if len(statements) != 1 or not isinstance(statements[0], (exp.Select, exp.Union)):
+            return {"success": False, "error": "단일 SELECT 문만 실행 계획을 확인합니다."}
+        sql_trim = statements[0].sql(dialect=DIALECTS[db_type])
+        
+        try:
+            with span("db"), self.engine.connect() as conn:
+                if db_type == "postgresql":
+                    raw = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql_trim}")).scalar()
+                    plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]["Plan"]
+                    total_cost = plan.get("Total Cost")
+                    plan_rows = plan.get("Plan Rows")
+                    seq_scans = []
+                    self._collect_pg_seq_scans(plan, seq_scans)
+                elif db_type == "mysql":
+                    raw = conn.execute(text(f"EXPLAIN FORMAT=JSON {sql_trim}")).scalar()
+                    plan = json.loads(raw) if isinstance(raw, str) else raw
+                    query_block = plan.get("query_block", {})
+                    cost = query_block.get("cost_info", {}).get("query_cost")
+                    total_cost = float(cost) if cost is not None else None
+                    seq_scans = []
+                    self._collect_mysql_full_scans(query_block, seq_scans)
+                    # MySQL은 최종 결과 행 수를 제공하지 않으므로 최대 스캔 행 수로 근사
+                    plan_rows = max((scan["rows"] for scan in seq_scans), default=None)
+                conn.rollback()
+            
+            return {
+                "success": True,
+                "total_cost": total_cost,
+                "plan_rows": plan_rows,
+                "seq_scans": seq_scans,
+                "plan": plan
+            }
+            
+        except SQLAlchemyError as e:
+            return {
+                "success": False,
+                "error": f"실행 계획 조회 실패: {str(e)}"
+            }
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            return {
+                "success": False,
+                "error": f"실행 계획 파싱 실패: {str(e)}"
+            }
+    
+    def _collect_pg_seq_scans(self, node: Dict[str, Any], seq_scans: List[Dict[str, Any]]):
+        """PostgreSQL 실행 계획 트리에서 Seq Scan 노드 수집"""
+        if node.get("Node Type") in ("Seq Scan", "Parallel Seq Scan"):
+            seq_scans.append({
+                "table": node.get("Relation Name"),
+                "rows": node.get("Plan Rows"),
+                "cost": node.get("Total Cost")
+            })
+        for child in node.get("Plans", []):
+            self._collect_pg_seq_scans(child, seq_scans)
+    
+    def _collect_mysql_full_scans(self, node: Any, seq_scans: List[Dict[str, Any]]):
+        """MySQL 실행 계획에서 access_type=ALL(전체 스캔) 테이블 수집"""
+        if isinstance(node, dict):
+            if node.get("access_type") == "ALL" and "table_name" in node:
+                seq_scans.append({
+                    "table": node.get("table_name"),
+                    "rows": node.get("rows_examined_per_scan"),
+                    "cost": node.get("cost_info", {}).get("read_cost")
+                })
+            for value in node.values():
+                self._collect_mysql_full_scans(value, seq_scans)
+        elif isinstance(node, list):
+            for item in node:
+                self._collect_mysql_full_scans(item, seq_scans)
+    
     def _serialize_value(self, value) -> Any:
         """값을 JSON 직렬화 가능한 형태로 변환"""
         if value is None:
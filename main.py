@@ -3,27 +3,52 @@ ETL LLM-based SQL Generator
 FastAPI 기반 메인 애플리케이션
 """
 
-from fastapi import FastAPI, HTTPException
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import HTMLResponse, FileResponse, ORJSONResponse, Response
 from pydantic import BaseModel
 from typing import Optional, List
 import os
+import gc
 
 from sql_generator import sql_generator
 from sample_metadata import SAMPLE_POSTGRES_ECOMMERCE, SAMPLE_MYSQL_HR, get_sample_metadata
 from db_connector import db_connector
+from static_assets import StaticAssetCache, CachedPage
+from admission import admission, AdmissionRejected, LANE_INTERACTIVE, LANE_SAMPLES, client_id
+from profiling import PROFILING_ENABLED, ProfilingMiddleware, profile_store, span, authorized
+from rule_engine import rule_engine
+from refine_sessions import refine_sessions
 
 app = FastAPI(
     title="ETL SQL Generator",
     description="LLM 기반 자연어 → SQL 변환 서비스",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
-# 정적 파일 서빙
+# 메타데이터, 쿼리 결과 등 큰 JSON 응답 압축 (사전 압축된 정적 파일은 제외됨)
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+# X-Profile 헤더 요청 프로파일링 (꺼져 있으면 미들웨어 자체를 등록하지 않음)
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
+# 정적 파일 및 메인 페이지 메모리 캐시
 static_dir = os.path.join(os.path.dirname(__file__), "static")
-if os.path.exists(static_dir):
-    app.mount("/static", StaticFiles(directory=static_dir), name="static")
+static_assets = StaticAssetCache(static_dir)
+index_page = CachedPage(os.path.join(os.path.dirname(__file__), "templates", "index.html"), static_assets)
+
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    """허용량 초과/부하 차단은 대기 없이 Retry-After와 함께 즉시 응답"""
+    return ORJSONResponse(
+        status_code=exc.status_code,
+        content={"detail": exc.detail},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
 
 
 # ===== Request/Response Models =====
@@ -34,6 +59,7 @@ class SQLGenerateRequest(BaseModel):
     database_info: Optional[dict] = None  # DB 메타데이터
     db_type: Optional[str] = "PostgreSQL"  # 샘플 메타데이터 사용 시
     include_etl: bool = False  # ETL 파이프라인 포함 여부
+    check_plan: bool = False  # 연결된 DB에서 EXPLAIN으로 실행 계획 검사 여부
     provider: Optional[str] = "openai" # google or openai
     model_name: Optional[str] = "gpt-5-mini-2025-08-07"
 
@@ -48,6 +74,17 @@ class SQLGenerateResponse(BaseModel):
     is_blocked: bool
     block_reason: Optional[str]
     etl_pipeline: Optional[dict] = None
+    plan_cost: Optional[float] = None  # EXPLAIN 예상 비용
+    plan_rows: Optional[float] = None  # EXPLAIN 예상 행 수
+    confidence: Optional[float] = None  # 규칙 기반 빠른 경로 신뢰도 (LLM 생성 시 None)
+    session_id: Optional[str] = None  # 후속 요청(/api/refine-sql)용 세션 ID
+
+
+class SQLRefineRequest(BaseModel):
+    """이전 생성 결과에 대한 후속 수정 요청"""
+    session_id: str
+    request: str  # 변경 사항만 ("지난달만", "카테고리명 추가")
+    check_plan: bool = False
 
 
 class DBConnectionRequest(BaseModel):
@@ -64,29 +101,44 @@ class QueryExecuteRequest(BaseModel):
     """쿼리 실행 요청"""
     sql: str
     limit: int = 10
+    approximate: bool = False  # 대용량 테이블 표본 실행 (COUNT/SUM은 전체 규모로 환산)
+    sample_percent: Optional[float] = None  # 기본값 APPROX_SAMPLE_PERCENT
 
 
 # ===== Page Routes =====
 
 @app.get("/", response_class=HTMLResponse)
-async def root():
+async def root(request: Request):
     """메인 페이지"""
-    html_path = os.path.join(os.path.dirname(__file__), "templates", "index.html")
-    if os.path.exists(html_path):
-        with open(html_path, "r", encoding="utf-8") as f:
-            return HTMLResponse(content=f.read())
+    response = index_page.response(request)
+    if response is not None:
+        return response
     return HTMLResponse(content="<h1>ETL SQL Generator</h1><p>templates/index.html not found</p>")
 
 
+@app.api_route("/static/{file_path:path}", methods=["GET", "HEAD"], include_in_schema=False)
+async def static_files(file_path: str, request: Request):
+    """정적 파일 (사전 압축본, ETag, 버전 URL 장기 캐싱)"""
+    return static_assets.response(request, file_path)
+
+
 # ===== SQL Generation API =====
 
+def _scoped_metadata(user_request: str) -> dict:
+    """스코프 메타데이터 로딩 (DB 조회가 이벤트 루프를 막지 않도록 스레드 풀에서 실행)"""
+    with span("metadata"):
+        return db_connector.build_scoped_metadata(user_request)
+
+
 @app.post("/api/generate-sql", response_model=SQLGenerateResponse)
-async def generate_sql(request: SQLGenerateRequest):
+async def generate_sql(request: SQLGenerateRequest, http_request: Request):
     """자연어 요청을 SQL로 변환"""
     
     if not request.request.strip():
         raise HTTPException(status_code=400, detail="요청 내용을 입력해주세요.")
     
+    await run_in_threadpool(admission.check_rate, client_id(http_request))
+    
     # 메타데이터 결정
     db_info = None
 
@@ -94,10 +146,10 @@ async def generate_sql(request: SQLGenerateRequest):
     if request.database_info:
         db_info = request.database_info
     
-    # 2. 연결된 Live DB가 있다면 메타데이터 추출하여 사용
+    # 2. 연결된 Live DB가 있다면 요청과 관련된 테이블만 상세 로딩하여 사용
     if not db_info and db_connector.engine:
         print("Using Live DB Metadata...")
-        meta_result = db_connector.extract_metadata()
+        meta_result = await run_in_threadpool(_scoped_metadata, request.request)
         if meta_result.get("success"):
             db_info = meta_result.get("metadata")
             
@@ -106,18 +158,47 @@ async def generate_sql(request: SQLGenerateRequest):
         print("Using Sample Metadata...")
         db_info = get_sample_metadata(request.db_type or "PostgreSQL")
     
-    # SQL 생성
-    result = sql_generator.generate_sql(
+    # SQL 생성 (대화형 레인, LLM 호출은 우선순위 대기열을 거침)
+    result = await admission.run(
+        LANE_INTERACTIVE,
+        sql_generator.generate_sql,
         user_request=request.request,
         database_info=db_info,
         include_etl=request.include_etl,
         provider=request.provider,
-        model_name=request.model_name
+        model_name=request.model_name,
+        plan_checker=db_connector.explain_query if request.check_plan and db_connector.engine else None
     )
     
     return SQLGenerateResponse(**result)
 
 
+@app.post("/api/refine-sql", response_model=SQLGenerateResponse)
+async def refine_sql(request: SQLRefineRequest, http_request: Request):
+    """세션의 스키마와 직전 SQL을 기준으로 후속 요청 반영"""
+    
+    if not request.request.strip():
+        raise HTTPException(status_code=400, detail="요청 내용을 입력해주세요.")
+    
+    await run_in_threadpool(admission.check_rate, client_id(http_request))
+    
+    # 세션은 모든 워커가 공유하는 저장소에 있음. 만료되었으면 404 (클라이언트는 이전 요청과 합쳐 새로 생성)
+    session = await run_in_threadpool(refine_sessions.get, request.session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="세션이 만료되었거나 존재하지 않습니다.")
+    
+    result = await admission.run(
+        LANE_INTERACTIVE,
+        sql_generator.refine_sql,
+        session,
+        request.request,
+        plan_checker=db_connector.explain_query if request.check_plan and db_connector.engine else None
+    )
+    result["session_id"] = session.id
+    
+    return SQLGenerateResponse(**result)
+
+
 @app.get("/api/sample-metadata/{db_type}")
 async def get_sample_metadata_api(db_type: str):
     """샘플 메타데이터 조회"""
@@ -180,27 +261,40 @@ async def extract_metadata():
     if not result.get("success"):
         raise HTTPException(status_code=400, detail=result.get("error", "메타데이터 추출 실패"))
     
-    return result
+    # 카탈로그에서 바로 JSON 바이트로 인코딩하여 전송
+    return Response(content=db_connector.get_metadata_payload(), media_type="application/json")
+
+
+@app.get("/api/db/tables")
+async def list_tables():
+    """전체 스키마의 테이블 목록 (컬럼 상세 제외)"""
+    result = db_connector.list_tables()
+    
+    if not result.get("success"):
+        raise HTTPException(status_code=400, detail=result.get("error", "테이블 목록 조회 실패"))
+    
+    return {k: v for k, v in result.items() if not k.startswith("_")}
 
 
 @app.post("/api/generate-samples")
-async def generate_samples(request: dict = None):
+async def generate_samples(http_request: Request, request: dict = None):
     """메타데이터 기반 샘플 쿼리 생성"""
     
+    await run_in_threadpool(admission.check_rate, client_id(http_request))
     provider = request.get("provider", "google") if request else "google"
     model_name = request.get("model_name", "gemini-3.0-flash") if request else "gemini-3.0-flash"
 
     # 1. 연결된 DB가 있으면 Live Metadata 사용
     if db_connector.engine:
-        meta_result = db_connector.extract_metadata()
+        meta_result = await run_in_threadpool(_scoped_metadata, "")
         if meta_result.get("success"):
             metadata = meta_result.get("metadata")
-            samples = sql_generator.generate_sample_queries(metadata, provider=provider, model_name=model_name)
+            samples = await admission.run(LANE_SAMPLES, sql_generator.generate_sample_queries, metadata, provider=provider, model_name=model_name)
             return {"samples": samples}
     
     # 2. 없으면 요청으로 들어온 메타데이터 사용
     if request and request.get("metadata"):
-        samples = sql_generator.generate_sample_queries(request.get("metadata"), provider=provider, model_name=model_name)
+        samples = await admission.run(LANE_SAMPLES, sql_generator.generate_sample_queries, request.get("metadata"), provider=provider, model_name=model_name)
         return {"samples": samples}
         
     raise HTTPException(status_code=400, detail="데이터베이스 연결이 필요합니다.")
@@ -209,7 +303,7 @@ async def generate_samples(request: dict = None):
 @app.post("/api/db/execute")
 async def execute_query(request: QueryExecuteRequest):
     """쿼리 실행"""
-    result = db_connector.test_query(request.sql, request.limit)
+    result = db_connector.test_query(request.sql, request.limit, request.approximate, request.sample_percent)
     
     if not result.get("success"):
         raise HTTPException(status_code=400, detail=result.get("error", "쿼리 실행 실패"))
@@ -217,12 +311,49 @@ async def execute_query(request: QueryExecuteRequest):
     return result
 
 
+# ===== Profiling API =====
+
+@app.get("/api/admin/profiles")
+async def list_profiles(request: Request):
+    """최근 프로파일링된 요청 목록 (이 워커 기준)"""
+    if not authorized(request.headers.get("x-profile-token")):
+        raise HTTPException(status_code=404, detail="Not Found")
+    return {"profiles": profile_store.summaries()}
+
+
+@app.get("/api/admin/profiles/{profile_id}")
+async def get_profile(profile_id: str, request: Request):
+    """프로파일 보고서 (구간 시간, 스택 샘플, 메모리 할당 변화)"""
+    if not authorized(request.headers.get("x-profile-token")):
+        raise HTTPException(status_code=404, detail="Not Found")
+    report = profile_store.get(profile_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail="프로파일을 찾을 수 없습니다.")
+    return report
+
+
 # ===== Health Check =====
 
 @app.get("/api/health")
 async def health_check():
     """헬스 체크"""
-    return {"status": "ok", "service": "ETL SQL Generator"}
+    return {"status": "ok", "service": "ETL SQL Generator", "llm_admission": admission.stats()}
+
+
+# ===== Preload =====
+
+def warm_shared_state():
+    """읽기 전용 공유 상태를 미리 생성 (gunicorn --preload 시 마스터에서 1회, 워커는 fork로 공유)"""
+    # 샘플 메타데이터의 카탈로그/검색어 인덱스
+    for metadata in (SAMPLE_POSTGRES_ECOMMERCE, SAMPLE_MYSQL_HR):
+        rule_engine.get_index(metadata)
+    # 메인 페이지 (정적 파일은 StaticAssetCache 생성 시 이미 압축됨)
+    index_page.warm()
+    # 이후 생성된 객체만 GC 대상으로 두어 워커에서 공유 페이지가 복사되지 않도록 함
+    gc.freeze()
+
+
+warm_shared_state()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,289 @@
+"""
+Request Profiling
+설정 플래그 + 요청 헤더로 켜는 단일 요청 프로파일링 (구간 시간, 스택 샘플링, 메모리 할당 변화)
+"""
+
+import os
+import sys
+import hmac
+import time
+import uuid
+import threading
+import tracemalloc
+from collections import OrderedDict, Counter
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, List
+
+
+# 꺼져 있으면 미들웨어를 등록하지 않고 span()도 아무것도 하지 않는 함수로 대체
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+# X-Profile 헤더 값과 관리자 엔드포인트의 X-Profile-Token 헤더가 이 값과 같아야 함 (필수)
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "").strip()
+
+if PROFILING_ENABLED and not PROFILE_TOKEN:
+    # 토큰 없이 켜면 누구나 워커의 tracemalloc/스택 샘플링을 켤 수 있으므로 비활성화
+    print("⚠️ PROFILE_TOKEN이 설정되지 않아 프로파일링을 비활성화합니다.")
+    PROFILING_ENABLED = False
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5")) / 1000
+PROFILE_REPORTS_KEPT = int(os.getenv("PROFILE_REPORTS_KEPT", "20"))
+
+PROFILE_HEADER = b"x-profile"
+PROFILED_PATHS = {"/api/generate-sql", "/api/refine-sql", "/api/generate-samples", "/api/db/execute"}
+
+MAX_STACK_DEPTH = 64
+TOP_ENTRIES = 15
+
+_active_profile: ContextVar[Optional["RequestProfile"]] = ContextVar("active_profile", default=None)
+
+# 동시에 여러 요청을 프로파일링할 때 tracemalloc 시작/중지를 한 번만
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+_tracemalloc_owned = False  # 외부에서(PYTHONTRACEMALLOC 등) 켠 추적은 끄지 않음
+
+
+class RequestProfile:
+    """단일 요청의 구간 시간, 스레드 스택 샘플, 메모리 할당 변화 기록"""
+
+    def __init__(self, method: str, path: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.method = method
+        self.path = path
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self.status_code: Optional[int] = None
+        self.spans: List[Dict[str, Any]] = []
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+
+        # span 안에 있는 스레드만 샘플링 (thread id → 중첩 깊이)
+        self._threads: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._start = 0.0
+        self._duration = 0.0
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        self._memory: Dict[str, Any] = {}
+
+    def start(self):
+        global _tracemalloc_users, _tracemalloc_owned
+        with _tracemalloc_lock:
+            if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                _tracemalloc_owned = True
+            _tracemalloc_users += 1
+        tracemalloc.reset_peak()
+        self._snapshot = tracemalloc.take_snapshot()
+        self._memory["start_kb"] = tracemalloc.get_traced_memory()[0] / 1024
+
+        self._start = time.perf_counter()
+        self._sampler = threading.Thread(target=self._sample_loop, name=f"profiler-{self.id}", daemon=True)
+        self._sampler.start()
+
+    def finish(self):
+        global _tracemalloc_users, _tracemalloc_owned
+        self._duration = time.perf_counter() - self._start
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+
+        current, peak = tracemalloc.get_traced_memory()
+        top = tracemalloc.take_snapshot().compare_to(self._snapshot, "lineno")[:TOP_ENTRIES] if self._snapshot else []
+        self._snapshot = None
+        self._memory.update({
+            "end_kb": current / 1024,
+            "peak_kb": peak / 1024,
+            "top_allocations": [
+                {"location": str(stat.traceback[0]), "size_diff_kb": round(stat.size_diff / 1024, 1), "count_diff": stat.count_diff}
+                for stat in top if stat.size_diff
+            ]
+        })
+        with _tracemalloc_lock:
+            _tracemalloc_users -= 1
+            if _tracemalloc_users == 0 and _tracemalloc_owned:
+                tracemalloc.stop()
+                _tracemalloc_owned = False
+
+    @contextmanager
+    def span(self, name: str):
+        """구간 시간과 메모리 변화 기록 (구간 동안 현재 스레드를 샘플링 대상으로 등록)"""
+        ident = threading.get_ident()
+        with self._lock:
+            self._threads[ident] = self._threads.get(ident, 0) + 1
+        memory_before = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            memory_after = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+            with self._lock:
+                depth = self._threads[ident] - 1
+                if depth:
+                    self._threads[ident] = depth
+                else:
+                    del self._threads[ident]
+                self.spans.append({
+                    "name": name,
+                    "start_ms": round((started - self._start) * 1000, 2),
+                    "duration_ms": round(elapsed * 1000, 2),
+                    "memory_delta_kb": round((memory_after - memory_before) / 1024, 1),
+                    "thread": threading.current_thread().name
+                })
+
+    def _sample_loop(self):
+        while not self._stop.wait(PROFILE_SAMPLE_INTERVAL):
+            with self._lock:
+                idents = list(self._threads)
+            if not idents:
+                continue
+            frames = sys._current_frames()
+            for ident in idents:
+                frame = frames.get(ident)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+                    frame = frame.f_back
+                self.samples[tuple(reversed(stack))] += 1
+                self.sample_count += 1
+
+    def report(self) -> Dict[str, Any]:
+        own: Counter = Counter()
+        total: Counter = Counter()
+        for stack, count in self.samples.items():
+            own[_function_name(stack[-1])] += count
+            for name in {_function_name(frame) for frame in stack}:
+                total[name] += count
+
+        span_totals: Dict[str, float] = {}
+        for s in self.spans:
+            span_totals[s["name"]] = round(span_totals.get(s["name"], 0.0) + s["duration_ms"], 2)
+
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "started_at": self.started_at,
+            "status_code": self.status_code,
+            "duration_ms": round(self._duration * 1000, 2),
+            "span_totals_ms": span_totals,
+            "spans": sorted(self.spans, key=lambda s: s["start_ms"]),
+            "sampling": {
+                "interval_ms": PROFILE_SAMPLE_INTERVAL * 1000,
+                "samples": self.sample_count,
+                "top_self": [{"function": name, "samples": count} for name, count in own.most_common(TOP_ENTRIES)],
+                "top_total": [{"function": name, "samples": count} for name, count in total.most_common(TOP_ENTRIES)],
+                # flamegraph.pl / speedscope에 바로 넣을 수 있는 collapsed stack 형식
+                "collapsed": [f"{';'.join(stack)} {count}" for stack, count in self.samples.most_common(200)]
+            },
+            "memory": {
+                "delta_kb": round(self._memory.get("end_kb", 0) - self._memory.get("start_kb", 0), 1),
+                "peak_kb": round(self._memory.get("peak_kb", 0), 1),
+                "top_allocations": self._memory.get("top_allocations", [])
+            }
+        }
+
+
+class ProfileStore:
+    """최근 프로파일 보고서 보관 (워커별, 최대 PROFILE_REPORTS_KEPT개)"""
+
+    def __init__(self, max_reports: int = PROFILE_REPORTS_KEPT):
+        self.max_reports = max_reports
+        self.reports: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, report: Dict[str, Any]):
+        with self._lock:
+            self.reports[report["id"]] = report
+            while len(self.reports) > self.max_reports:
+                self.reports.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self.reports.get(profile_id)
+
+    def summaries(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                {k: r[k] for k in ("id", "method", "path", "started_at", "status_code", "duration_ms", "span_totals_ms")}
+                for r in reversed(self.reports.values())
+            ]
+
+
+class ProfilingMiddleware:
+    """X-Profile 헤더가 있는 요청만 프로파일링하는 ASGI 미들웨어 (PROFILING_ENABLED일 때만 등록)"""
+
+    def __init__(self, app, paths: Optional[set] = None):
+        self.app = app
+        self.paths = paths or PROFILED_PATHS
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths or not _profile_requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope["method"], scope["path"])
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                profile.status_code = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile.id.encode())]
+            await send(message)
+
+        token = _active_profile.set(profile)
+        profile.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profile.finish()
+            _active_profile.reset(token)
+            profile_store.add(profile.report())
+
+
+def _profile_requested(scope) -> bool:
+    for key, value in scope["headers"]:
+        if key == PROFILE_HEADER:
+            return _token_matches(value.decode("latin-1").strip())
+    return False
+
+
+def _token_matches(token: Optional[str]) -> bool:
+    if not PROFILE_TOKEN or not token:
+        return False
+    return hmac.compare_digest(token.encode(), PROFILE_TOKEN.encode())
+
+
+def _function_name(frame: str) -> str:
+    # "file.py:func:line" → "file.py:func"
+    return frame.rsplit(":", 1)[0]
+
+
+_NOOP_SPAN = nullcontext()
+
+
+def _noop_span(name: str):
+    return _NOOP_SPAN
+
+
+def _profile_span(name: str):
+    profile = _active_profile.get()
+    if profile is None:
+        return _NOOP_SPAN
+    return profile.span(name)
+
+
+# 프로파일링이 꺼져 있으면 호출 지점마다 미리 만든 nullcontext만 반환
+span = _profile_span if PROFILING_ENABLED else _noop_span
+
+
+def authorized(token: Optional[str]) -> bool:
+    """관리자 엔드포인트 접근 허용 여부"""
+    return PROFILING_ENABLED and _token_matches(token)
+
+
+# 싱글톤 인스턴스
+profile_store = ProfileStore()
@@ -0,0 +1,276 @@
+"""
+Parameterized Query Templates
+리터럴만 다른 요청("3월 10만원 이상 주문" / "4월 5만원 이상 주문")에 대해 저장된 SQL을 치환하여 재사용
+"""
+
+import os
+import re
+import calendar
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple
+
+from rule_engine import rule_engine
+from schema_catalog import get_catalog
+
+
+TEMPLATE_CACHE_SIZE = int(os.getenv("TEMPLATE_CACHE_SIZE", "512"))
+
+MONTH_NAMES = {name.lower(): i for i, name in enumerate(calendar.month_name) if name}
+MONTH_NAMES.update({name.lower(): i for i, name in enumerate(calendar.month_abbr) if name})
+
+KOREAN_MULTIPLIERS = {"천": 1_000, "만": 10_000, "억": 100_000_000}
+
+# 요청 문장에서 리터럴 후보 (앞에 나온 패턴이 우선)
+REQUEST_LITERAL_PATTERN = re.compile(
+    r"(?P<date>\b\d{4}[-/.]\d{1,2}[-/.]\d{1,2}\b)"
+    r"|(?P<quoted>'[^']+'|\"[^\"]+\")"
+    r"|(?<!\d)(?P<year>\d{4})년"
+    r"|(?<!\d)(?P<kmonth>\d{1,2})월"
+    r"|(?P<number>\d+(?:,\d{3})*(?:\.\d+)?)(?P<mult>[천만억])?"
+    r"|(?P<word>[A-Za-z_]+)"
+)
+SQL_DATE_PATTERN = re.compile(r"'(\d{4})-(\d{2})-(\d{2})((?:[ T][0-9:.]+)?)'")
+
+# 월/연도 슬롯이 있는 템플릿의 기간 경계 리터럴 표시 (스팬의 slot_index 자리)
+PERIOD_START = -1  # 기간 시작일 또는 다음 기간 시작일: 개월 수만큼 이동
+PERIOD_END = -2    # 기간 마지막 날: 이동한 달의 마지막 날
+
+
+class QueryTemplateCache:
+    """성공한 생성 결과를 리터럴 슬롯이 있는 템플릿으로 저장하는 LRU 캐시"""
+
+    def __init__(self, max_size: int = TEMPLATE_CACHE_SIZE):
+        self.max_size = max_size
+        self.templates: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+
+    def lookup(self, user_request: str, database_info: dict) -> Optional[Dict[str, Any]]:
+        """같은 형태의 템플릿이 있으면 새 리터럴로 치환한 응답 반환"""
+        shape, slots = self._extract(user_request, database_info)
+        if not slots:
+            return None
+
+        key = (get_catalog(database_info).fingerprint, shape)
+        template = self.templates.get(key)
+        if template is None:
+            return None
+        self.templates.move_to_end(key)
+
+        sql = self._render(template, slots)
+        if sql is None:
+            return None
+
+        result = {k: (list(v) if isinstance(v, list) else v) for k, v in template["result"].items()}
+        result["sql"] = sql
+        result["intent_summary"] = user_request
+        result["assumptions"] = ["리터럴만 다른 이전 요청의 쿼리 템플릿을 재사용했습니다."]
+        result["safety_notes"] = []
+        return result
+
+    def store(self, user_request: str, database_info: dict, result: Dict[str, Any]):
+        """SQL 안에서 모든 리터럴 위치를 특정할 수 있을 때만 템플릿으로 저장"""
+        sql = result.get("sql")
+        if not sql or result.get("is_blocked"):
+            return
+
+        shape, slots = self._extract(user_request, database_info)
+        if not slots:
+            return
+
+        spans = self._locate(sql, slots)
+        if spans is None:
+            return
+
+        # 가정/주의사항("100원 초과 주문으로 가정", "예상 비용 X → Y")은 원래 리터럴 기준이므로 저장하지 않음
+        key = (get_catalog(database_info).fingerprint, shape)
+        self.templates[key] = {
+            "sql": sql,
+            "slots": slots,
+            "spans": spans,
+            "result": {
+                k: v for k, v in result.items()
+                if k not in ("sql", "plan_cost", "plan_rows", "confidence", "assumptions", "safety_notes")
+            }
+        }
+        self.templates.move_to_end(key)
+        while len(self.templates) > self.max_size:
+            self.templates.popitem(last=False)
+
+    # ===== Literal extraction =====
+
+    def _extract(self, user_request: str, database_info: dict) -> Tuple[str, List[Tuple[str, Any]]]:
+        """요청을 (형태 키, 슬롯 목록)으로 분해. 슬롯은 (종류, 값)"""
+        values = rule_engine.get_index(database_info).values
+        slots: List[Tuple[str, Any]] = []
+        parts: List[str] = []
+        last = 0
+
+        for m in REQUEST_LITERAL_PATTERN.finditer(user_request):
+            slot = None
+            if m.group("date"):
+                y, mo, d = re.split(r"[-/.]", m.group("date"))
+                slot = ("date", f"{int(y):04d}-{int(mo):02d}-{int(d):02d}")
+            elif m.group("quoted"):
+                slot = ("string", m.group("quoted")[1:-1])
+            elif m.group("year"):
+                slot = ("year", int(m.group("year")))
+            elif m.group("kmonth") and 1 <= int(m.group("kmonth")) <= 12:
+                slot = ("month", int(m.group("kmonth")))
+            elif m.group("number"):
+                number = float(m.group("number").replace(",", ""))
+                if m.group("mult"):
+                    number *= KOREAN_MULTIPLIERS[m.group("mult")]
+                slot = ("number", int(number) if number.is_integer() else number)
+            elif m.group("word"):
+                word = m.group("word").lower()
+                if word in MONTH_NAMES and len(word) >= 3:
+                    slot = ("month", MONTH_NAMES[word])
+                elif word in values:
+                    # 같은 형태라도 다른 컬럼의 값이면 다른 템플릿
+                    table, column = values[word][0]
+                    slot = (f"value:{table}.{column}", word)
+
+            if slot is None:
+                continue
+            parts.append(user_request[last:m.start()])
+            parts.append("{" + slot[0] + "}")
+            slots.append(slot)
+            last = m.end()
+
+        parts.append(user_request[last:])
+        shape = re.sub(r"\s+", " ", "".join(parts).strip().lower()).rstrip(".?!")
+        return shape, slots
+
+    # ===== SQL templating =====
+
+    def _locate(self, sql: str, slots: List[Tuple[str, Any]]) -> Optional[List[Tuple[int, int, int]]]:
+        """각 슬롯 값이 SQL의 어디에 쓰였는지 (start, end, slot_index). 모호하면 None"""
+        spans: List[Tuple[int, int, int]] = []
+        has_shift = False
+
+        for i, (kind, value) in enumerate(slots):
+            if kind in ("month", "year"):
+                has_shift = True
+                continue
+            if [v for k, v in slots if k == kind].count(value) > 1:
+                return None
+
+            if kind == "number":
+                pattern = rf"(?<![\w.']){re.escape(str(value))}(?:\.0+)?(?![\w.'])"
+            elif kind == "date":
+                pattern = rf"(?<=')" + re.escape(value)
+            else:
+                pattern = rf"(?<=')" + re.escape(str(value)) + r"(?=')"
+
+            # 같은 값이 여러 곳에 쓰이면("> 100 ... LIMIT 100") 어느 쪽이 요청의 리터럴인지 알 수 없음
+            found = [(m.start(), m.end(), i) for m in re.finditer(pattern, sql, re.IGNORECASE)]
+            if len(found) != 1:
+                return None
+            spans.extend(found)
+
+        if has_shift:
+            period = self._locate_period(sql, slots, spans)
+            if period is None:
+                return None
+            spans.extend(period)
+
+        spans.sort()
+        for (s1, e1, _), (s2, _, _) in zip(spans, spans[1:]):
+            if s2 < e1:
+                return None
+        return spans
+
+    def _locate_period(self, sql: str, slots: List[Tuple[str, Any]], taken: List[Tuple[int, int, int]]) -> Optional[List[Tuple[int, int, int]]]:
+        """
+        월/연도 슬롯이 요청한 기간과 일치하는 날짜 리터럴 한 쌍의 위치.
+        [시작일, 다음 기간 시작일) 또는 [시작일, 마지막 날] 형태만 인정하고,
+        월/연도 숫자가 SQL의 다른 곳(EXTRACT(MONTH ...) = 3 등)에 쓰였으면 치환할 수 없으므로 None
+        """
+        months = [v for k, v in slots if k == "month"]
+        years = [v for k, v in slots if k == "year"]
+        if len(months) > 1 or len(years) > 1:
+            return None
+
+        dates = [m for m in SQL_DATE_PATTERN.finditer(sql) if not any(s <= m.start() < e for s, e, _ in taken)]
+        if len(dates) != 2:
+            return None
+        (y1, m1, d1), end = [(int(m.group(1)), int(m.group(2)), int(m.group(3))) for m in dates]
+        if d1 != 1:
+            return None
+
+        if months:
+            if m1 != months[0] or (years and y1 != years[0]):
+                return None
+            period_months = 1
+        else:
+            if m1 != 1 or y1 != years[0]:
+                return None
+            period_months = 12
+
+        next_year, next_month = _add_months(y1, m1, period_months)
+        last_year, last_month = _add_months(y1, m1, period_months - 1)
+        if end == (next_year, next_month, 1):
+            end_kind = PERIOD_START
+        elif end == (last_year, last_month, calendar.monthrange(last_year, last_month)[1]):
+            end_kind = PERIOD_END
+        else:
+            return None
+
+        period = [(dates[0].start(), dates[0].end(), PERIOD_START), (dates[1].start(), dates[1].end(), end_kind)]
+        occupied = taken + period
+        patterns = [rf"(?<![\w.])0?{month}(?![\w.])" for month in months] + [rf"(?<![\w.]){year}(?![\w.])" for year in years]
+        for pattern in patterns:
+            if any(not any(s <= m.start() < e for s, e, _ in occupied) for m in re.finditer(pattern, sql)):
+                return None
+        return period
+
+    def _render(self, template: Dict[str, Any], slots: List[Tuple[str, Any]]) -> Optional[str]:
+        old_slots = template["slots"]
+        if [k for k, _ in old_slots] != [k for k, _ in slots]:
+            return None
+
+        month_shift = 0
+        for (kind, old), (_, new) in zip(old_slots, slots):
+            if kind == "month":
+                month_shift += new - old
+            elif kind == "year":
+                month_shift += (new - old) * 12
+
+        sql = template["sql"]
+        out: List[str] = []
+        last = 0
+        for start, end, index in template["spans"]:
+            out.append(sql[last:start])
+            if index in (PERIOD_START, PERIOD_END):
+                out.append(_shift_date_literal(sql[start:end], month_shift, month_end=index == PERIOD_END))
+            else:
+                kind, value = slots[index]
+                out.append(_format_literal(kind, value))
+            last = end
+        out.append(sql[last:])
+        return "".join(out)
+
+
+def _format_literal(kind: str, value: Any) -> str:
+    if kind == "number":
+        return str(value)
+    # 문자열/값 슬롯은 따옴표 안쪽만 치환되므로 이스케이프만 처리
+    return str(value).replace("'", "''")
+
+
+def _add_months(year: int, month: int, months: int) -> Tuple[int, int]:
+    year, month = divmod(year * 12 + (month - 1) + months, 12)
+    return year, month + 1
+
+
+def _shift_date_literal(literal: str, months: int, month_end: bool = False) -> str:
+    """기간 시작일(1일)은 1일로, 마지막 날은 이동한 달의 마지막 날로 이동"""
+    m = SQL_DATE_PATTERN.fullmatch(literal)
+    if not m or months == 0:
+        return literal
+    year, month = _add_months(int(m.group(1)), int(m.group(2)), months)
+    day = calendar.monthrange(year, month)[1] if month_end else int(m.group(3))
+    return f"'{year:04d}-{month:02d}-{day:02d}{m.group(4)}'"
+
+
+# 싱글톤 인스턴스
+query_templates = QueryTemplateCache()
@@ -0,0 +1,164 @@
+"""
+Refinement Sessions
+후속 요청("지난달만", "카테고리명 추가")을 위해 세션별 스키마, 직전 SQL, 대화 내역을 서버에 보관
+"""
+
+import os
+import time
+import uuid
+import sqlite3
+import tempfile
+from typing import Optional, Dict, Any, List
+
+import orjson
+
+
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", "1800"))
+MAX_SESSIONS = int(os.getenv("MAX_SESSIONS", "500"))
+# 첫 턴(스키마 포함)은 항상 유지하고, 이후 턴은 최근 N개만 유지
+MAX_SESSION_TURNS = int(os.getenv("MAX_SESSION_TURNS", "10"))
+# 같은 호스트의 모든 워커 프로세스가 공유하는 세션 저장 파일
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", os.path.join(tempfile.gettempdir(), "sql_refine_sessions.sqlite3"))
+
+
+class RefinementSession:
+    """단일 세션의 해석된 메타데이터와 공급자에 보낸 그대로의 대화 내역"""
+
+    def __init__(self, database_info: dict, include_etl: bool, provider: str, model_name: str, session_id: Optional[str] = None):
+        self.id = session_id or uuid.uuid4().hex
+        self.database_info = database_info
+        self.include_etl = include_etl
+        self.provider = provider
+        self.model_name = model_name
+        # 공급자에 보낸 그대로의 [{"role": "user" | "assistant", "content": str}]
+        # 매 턴 앞부분(시스템 프롬프트 + 스키마가 담긴 첫 요청)이 동일하여 공급자 프리픽스 캐시가 적용됨
+        self.messages: List[Dict[str, str]] = []
+        self.requests: List[str] = []
+        self.last_result: Optional[Dict[str, Any]] = None
+        # 저장된 버전 (0이면 아직 저장 전) - 다른 워커의 동시 수정 감지용
+        self.version = 0
+
+    def add_turn(self, user_request: str, user_content: str, assistant_content: str, result: Dict[str, Any]):
+        self.requests.append(user_request)
+        self.messages.append({"role": "user", "content": user_content})
+        self.messages.append({"role": "assistant", "content": assistant_content})
+        self.last_result = result
+
+        # 첫 user/assistant 이후의 턴이 한도를 넘으면 오래된 턴부터 제거
+        overflow = (len(self.messages) - 2) // 2 - MAX_SESSION_TURNS
+        if overflow > 0:
+            del self.messages[2:2 + overflow * 2]
+
+    def request_history(self) -> str:
+        """재작성 프롬프트용 요청 요약 (최초 요청 + 후속 요청)"""
+        lines = [self.requests[0]] if self.requests else []
+        lines.extend(f"(후속) {request}" for request in self.requests[1:])
+        return "\n".join(lines)
+
+    def to_bytes(self) -> bytes:
+        return orjson.dumps({
+            "database_info": self.database_info,
+            "include_etl": self.include_etl,
+            "provider": self.provider,
+            "model_name": self.model_name,
+            "messages": self.messages,
+            "requests": self.requests,
+            "last_result": self.last_result
+        })
+
+    @classmethod
+    def from_bytes(cls, session_id: str, version: int, data: bytes) -> "RefinementSession":
+        fields = orjson.loads(data)
+        session = cls(fields["database_info"], fields["include_etl"], fields["provider"], fields["model_name"], session_id)
+        session.messages = fields["messages"]
+        session.requests = fields["requests"]
+        session.last_result = fields["last_result"]
+        session.version = version
+        return session
+
+
+class SessionStore:
+    """
+    워커 간 공유 세션 저장소 (SQLite 파일, 마지막 사용 후 SESSION_TTL_SECONDS 경과 시 만료, 최대 MAX_SESSIONS개).
+    gunicorn 워커 어느 쪽으로 후속 요청이 가도 같은 세션을 사용
+    """
+
+    def __init__(self, path: str = SESSION_DB_PATH, max_sessions: int = MAX_SESSIONS, ttl_seconds: int = SESSION_TTL_SECONDS):
+        self.path = path
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS refine_sessions ("
+                "id TEXT PRIMARY KEY, version INTEGER NOT NULL, updated REAL NOT NULL, data BLOB NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS refine_sessions_updated ON refine_sessions (updated)")
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        # fork 이후에도 안전하도록 연결은 작업마다 새로 열고 닫음
+        return sqlite3.connect(self.path, timeout=10, isolation_level=None)
+
+    def create(self, database_info: dict, include_etl: bool, provider: str, model_name: str) -> RefinementSession:
+        """새 세션 (첫 턴을 추가한 뒤 save()로 저장)"""
+        return RefinementSession(database_info, include_etl, provider, model_name)
+
+    def save(self, session: RefinementSession) -> bool:
+        """세션 저장. 읽은 뒤 다른 요청이 먼저 저장했으면 덮어쓰지 않고 False"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            if session.version == 0:
+                conn.execute(
+                    "INSERT INTO refine_sessions (id, version, updated, data) VALUES (?, 1, ?, ?)",
+                    (session.id, now, session.to_bytes())
+                )
+            else:
+                cursor = conn.execute(
+                    "UPDATE refine_sessions SET version = version + 1, updated = ?, data = ? WHERE id = ? AND version = ?",
+                    (now, session.to_bytes(), session.id, session.version)
+                )
+                if cursor.rowcount == 0:
+                    conn.execute("ROLLBACK")
+                    return False
+            self._expire(conn, now)
+            conn.execute("COMMIT")
+            session.version += 1
+            return True
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def get(self, session_id: str) -> Optional[RefinementSession]:
+        now = time.time()
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT version, data FROM refine_sessions WHERE id = ? AND updated >= ?",
+                (session_id, now - self.ttl_seconds)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE refine_sessions SET updated = ? WHERE id = ?", (now, session_id))
+        finally:
+            conn.close()
+        return RefinementSession.from_bytes(session_id, row[0], row[1])
+
+    def _expire(self, conn: sqlite3.Connection, now: float):
+        conn.execute("DELETE FROM refine_sessions WHERE updated < ?", (now - self.ttl_seconds,))
+        conn.execute(
+            "DELETE FROM refine_sessions WHERE id NOT IN "
+            "(SELECT id FROM refine_sessions ORDER BY updated DESC LIMIT ?)",
+            (self.max_sessions,)
+        )
+
+
+# 싱글톤 인스턴스
+refine_sessions = SessionStore()
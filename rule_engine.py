@@ -0,0 +1,638 @@
+"""
+Rule-based SQL Fast Path
+LLM 호출 없이 자주 쓰이는 단순 요청(최근 N건, 그룹별 건수, 그룹별 합계)을 템플릿으로 변환
+"""
+
+import re
+import math
+from collections import deque, OrderedDict
+from typing import Optional, Dict, Any, List, Tuple
+
+from schema_catalog import ColumnInfo, TableInfo, get_catalog
+
+
+DEFAULT_LIMIT = 10
+
+LATEST_KEYWORDS = {"latest", "recent", "newest", "last", "최근", "최신", "마지막"}
+COUNT_KEYWORDS = {"count", "how", "many", "number", "수", "개수", "건수", "몇", "인원", "인원수"}
+SUM_KEYWORDS = {"total", "sum", "합계", "합", "총", "총합", "총액"}
+GROUP_KEYWORDS = {"by", "per", "each", "마다", "기준"}
+MEASURE_SYNONYMS = {"sales", "revenue", "amount", "매출", "매출액", "판매액", "금액", "판매"}
+DESTRUCTIVE_KEYWORDS = {"delete", "drop", "truncate", "update", "insert", "alter", "삭제", "제거", "수정", "추가", "변경"}
+# 템플릿이 표현하지 못하는 조건 (정렬 기준 지정, 부정 조건) - 있으면 빠른 경로 포기
+SORT_KEYWORDS = {"sort", "sorted", "sorting", "ordered", "ascending", "descending", "asc", "desc",
+                 "정렬", "순으로", "오름차순", "내림차순"}
+NEGATION_KEYWORDS = {"not", "no", "non", "excluding", "exclude", "except", "without", "isn", "aren", "don", "doesn",
+                     "제외", "아닌", "아니", "빼고", "말고", "없는"}
+NEGATION_PREFIXES = ("제외", "아닌", "아니", "빼고")
+
+STOPWORDS = {
+    "show", "me", "list", "get", "give", "find", "all", "the", "a", "an", "of", "for", "in", "with",
+    "what", "is", "are", "please", "rows", "records", "items", "do", "we", "have", "there",
+    "보여줘", "보여주세요", "알려줘", "알려주세요", "조회", "조회해줘", "구해줘", "뽑아줘", "찾아줘",
+    "출력", "목록", "리스트", "데이터", "전체", "모든", "각", "줘", "해줘", "개", "건", "명", "는", "은", "의"
+}
+
+# 메타데이터 설명에서 검색어로 쓰기엔 너무 일반적인 단어
+GENERIC_DESCRIPTION_WORDS = {"정보", "고유", "id", "기록", "여부", "상세", "항목"}
+
+KOREAN_SUFFIXES = ("에서", "으로", "별로", "들의", "들", "을", "를", "이", "가", "은", "는", "의", "로", "와", "과", "도")
+
+NUMERIC_TYPES = ("INT", "DECIMAL", "NUMERIC", "FLOAT", "DOUBLE", "REAL", "MONEY", "SERIAL")
+AMOUNT_NAME_RANKS = (("total_amount", 4), ("amount", 3), ("total", 3), ("sales", 3), ("revenue", 3), ("price", 1))
+LABEL_COLUMN_NAMES = ("name", "title", "username", "label")
+
+TOKEN_PATTERN = re.compile(r"[0-9a-z_가-힣]+")
+NUMBER_PATTERN = re.compile(r"^(\d+)(개|건|명|rows?)?$")
+PAREN_VALUES_PATTERN = re.compile(r"\(([^)]*)\)")
+QUOTED_VALUE_PATTERN = re.compile(r"'([^']+)'")
+
+
+class SchemaTermIndex:
+    """테이블/컬럼명과 설명(한국어 포함)에서 만든 검색어 → 스키마 요소 인덱스"""
+
+    def __init__(self, database_info: dict):
+        self.tables: Dict[str, TableInfo] = {}
+        self.columns: Dict[str, Dict[str, ColumnInfo]] = {}
+        self.terms: Dict[str, List[Tuple[str, str, Optional[str], float]]] = {}
+        self.values: Dict[str, List[Tuple[str, str]]] = {}
+        self.fk_edges: Dict[str, List[Tuple[str, str, str]]] = {}
+
+        for table in get_catalog(database_info).tables.values():
+            table_name = table.name
+            self.tables[table_name] = table
+            self.columns[table_name] = {col.name: col for col in table.columns}
+            self.fk_edges.setdefault(table_name, [])
+
+            self._add_name_terms(table_name, "table", table_name, None, 1.0)
+            if "." in table_name:
+                # schema.table 형태면 테이블명만으로도 검색
+                self._add_name_terms(table_name.rsplit(".", 1)[1], "table", table_name, None, 1.0)
+            self._add_description_terms(table.description, "table", table_name, None)
+
+            for col in table.columns:
+                column_name = col.name
+                self._add_name_terms(column_name, "column", table_name, column_name, 0.9)
+                self._add_description_terms(col.description, "column", table_name, column_name)
+                for value in self.enumerated_values(col):
+                    self.values.setdefault(value.lower(), []).append((table_name, column_name))
+
+                if col.foreign_key and col.foreign_key[0] != table_name:
+                    ref_table, ref_column = col.foreign_key[0], col.foreign_key[1] or "id"
+                    self.fk_edges.setdefault(table_name, []).append((ref_table, column_name, ref_column))
+                    self.fk_edges.setdefault(ref_table, []).append((table_name, ref_column, column_name))
+
+    def _add_term(self, term: str, kind: str, table: str, column: Optional[str], weight: float):
+        term = term.lower()
+        if not term or term in GENERIC_DESCRIPTION_WORDS:
+            return
+        entries = self.terms.setdefault(term, [])
+        for i, (k, t, c, w) in enumerate(entries):
+            if (k, t, c) == (kind, table, column):
+                entries[i] = (k, t, c, max(w, weight))
+                return
+        entries.append((kind, table, column, weight))
+
+    def _add_name_terms(self, name: str, kind: str, table: str, column: Optional[str], weight: float):
+        name = name.lower()
+        self._add_term(name, kind, table, column, weight)
+        self._add_term(_singular(name), kind, table, column, weight)
+        parts = [p for p in name.split("_") if p and p != "id"]
+        if len(parts) > 1:
+            # order_date → date, user_id → user 처럼 부분 이름은 약하게
+            for part in parts:
+                self._add_term(part, kind, table, column, weight * 0.6)
+                self._add_term(_singular(part), kind, table, column, weight * 0.6)
+
+    def _add_description_terms(self, description: str, kind: str, table: str, column: Optional[str]):
+        words = TOKEN_PATTERN.findall(PAREN_VALUES_PATTERN.sub("", description.lower()))
+        for i, word in enumerate(words):
+            if word in GENERIC_DESCRIPTION_WORDS:
+                continue
+            # 첫 단어(주어)는 강하게, 설명이 길수록 약하게 ("주문 정보" > "주문 상세 항목")
+            weight = (0.9 if i == 0 else 0.5) / math.sqrt(len(words))
+            self._add_term(word, kind, table, column, weight)
+            if word.endswith("명") and len(word) > 2:
+                # "사용자명", "카테고리명" → 이름 컬럼
+                self._add_term(word[:-1], kind, table, column, weight * 0.5)
+
+    def enumerated_values(self, col: ColumnInfo) -> List[str]:
+        """설명 괄호 안의 값 목록 또는 ENUM 정의에서 허용 값 추출"""
+        values = []
+        if col.data_type.upper().startswith("ENUM"):
+            values.extend(QUOTED_VALUE_PATTERN.findall(col.data_type))
+        for group in PAREN_VALUES_PATTERN.findall(col.description):
+            candidates = [v.strip() for v in group.split(",")]
+            if len(candidates) > 1 and all(re.fullmatch(r"[a-z_]+", v) for v in candidates):
+                values.extend(candidates)
+        return values
+
+    def lookup(self, token: str) -> List[Tuple[str, str, Optional[str], float]]:
+        """토큰에 해당하는 스키마 요소 (조사 제거 후 재시도)"""
+        for candidate in _token_variants(token):
+            if candidate in self.terms:
+                return self.terms[candidate]
+        return []
+
+    def lookup_value(self, token: str) -> List[Tuple[str, str]]:
+        for candidate in _token_variants(token):
+            if candidate in self.values:
+                return self.values[candidate]
+        return []
+
+    def rank_tables(self, text: str, limit: int) -> List[str]:
+        """요청 문장과 관련도가 높은 테이블 순위 (테이블 직접 언급 > 컬럼 언급)"""
+        scores: Dict[str, float] = {}
+        for token in TOKEN_PATTERN.findall(text.lower()):
+            for kind, table, column, weight in self.lookup(token):
+                scores[table] = scores.get(table, 0.0) + (weight if kind == "table" else weight * 0.5)
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return [table for table, _ in ranked[:limit]]
+
+    def join_path(self, source: str, target: str, max_hops: int = 2) -> Optional[List[Tuple[str, str, str, str]]]:
+        """FK 그래프에서 source → target 조인 경로 (from_table, from_col, to_table, to_col)"""
+        if source == target:
+            return []
+        queue = deque([(source, [])])
+        visited = {source}
+        while queue:
+            table, path = queue.popleft()
+            if len(path) >= max_hops:
+                continue
+            for next_table, from_col, to_col in self.fk_edges.get(table, []):
+                if next_table in visited:
+                    continue
+                next_path = path + [(table, from_col, next_table, to_col)]
+                if next_table == target:
+                    return next_path
+                visited.add(next_table)
+                queue.append((next_table, next_path))
+        return None
+
+
+class RuleBasedGenerator:
+    """스키마 검색어 인덱스와 템플릿으로 단순 요청을 즉시 SQL로 변환"""
+
+    def __init__(self, max_cached_indexes: int = 8):
+        self.max_cached_indexes = max_cached_indexes
+        # id(database_info) → (database_info, index); 객체를 함께 보관하여 id 재사용 방지
+        # LRU: 요청마다 새로 만들어지는 스코프 메타데이터가 매번 쓰이는 테이블 목록 인덱스를 밀어내지 않도록
+        self._index_cache: "OrderedDict[int, Tuple[dict, SchemaTermIndex]]" = OrderedDict()
+
+    def get_index(self, database_info: dict) -> SchemaTermIndex:
+        key = id(database_info)
+        cached = self._index_cache.get(key)
+        if cached and cached[0] is database_info:
+            self._index_cache.move_to_end(key)
+            return cached[1]
+        index = SchemaTermIndex(database_info)
+        self._index_cache[key] = (database_info, index)
+        self._index_cache.move_to_end(key)
+        while len(self._index_cache) > self.max_cached_indexes:
+            self._index_cache.popitem(last=False)
+        return index
+
+    def generate(self, user_request: str, database_info: dict) -> Optional[Dict[str, Any]]:
+        """템플릿에 맞으면 신뢰도가 포함된 응답 dict, 아니면 None"""
+        tokens = TOKEN_PATTERN.findall(user_request.lower())
+        if not tokens or any(_base(t) in DESTRUCTIVE_KEYWORDS for t in tokens):
+            return None
+
+        index = self.get_index(database_info)
+        if not index.tables:
+            return None
+
+        parsed = self._parse(tokens, index)
+        if parsed is None:
+            return None
+
+        if parsed["sum"] or (parsed["measure_terms"] and parsed["group"]):
+            result = self._build_sum(parsed, index, database_info)
+        elif parsed["count"]:
+            result = self._build_count(parsed, index, database_info)
+        elif parsed["latest"]:
+            result = self._build_latest(parsed, index, database_info)
+        else:
+            return None
+
+        if result is None:
+            return None
+
+        sql, tables_used, intent, assumptions, certainty = result
+        confidence = round(certainty * parsed["coverage"], 2)
+        return {
+            "intent_summary": intent,
+            "sql": sql,
+            "assumptions": assumptions + [f"규칙 기반 빠른 경로로 생성되었습니다. (신뢰도 {confidence:.2f})"],
+            "safety_notes": [],
+            "tables_used": tables_used,
+            "is_blocked": False,
+            "block_reason": None,
+            "confidence": confidence
+        }
+
+    # ===== Parsing =====
+
+    def _parse(self, tokens: List[str], index: SchemaTermIndex) -> Optional[Dict[str, Any]]:
+        parsed = {
+            "latest": False, "count": False, "sum": False, "limit": None,
+            "group": None, "tables": [], "columns": [], "values": [], "measure_terms": [],
+            # 테이블과는 맞지 않고 컬럼에만 맞은 단어별 (테이블, 컬럼) 목록
+            "column_mentions": []
+        }
+        if _has_unsupported_modifier(tokens):
+            return None
+
+        content, recognized = 0, 0
+        skip = set()
+        numbers = []
+
+        for i, token in enumerate(tokens):
+            if i in skip:
+                continue
+            content += 1
+            base = _base(token)
+
+            number = NUMBER_PATTERN.match(token)
+            if number:
+                numbers.append((i, number))
+                recognized += 1
+                continue
+            if token in STOPWORDS or base in STOPWORDS:
+                recognized += 1
+                continue
+            if token in LATEST_KEYWORDS or base in LATEST_KEYWORDS:
+                parsed["latest"] = True
+                recognized += 1
+                continue
+            if token in COUNT_KEYWORDS or base in COUNT_KEYWORDS:
+                parsed["count"] = True
+                recognized += 1
+                continue
+            if token in SUM_KEYWORDS:
+                parsed["sum"] = True
+                recognized += 1
+                continue
+            if token in MEASURE_SYNONYMS or base in MEASURE_SYNONYMS:
+                parsed["measure_terms"].append(base)
+                recognized += 1
+                continue
+
+            if token in GROUP_KEYWORDS and i + 1 < len(tokens):
+                # "by status", "by order status"
+                group_tokens = [tokens[i + 1]]
+                if i + 2 < len(tokens) and index.lookup(tokens[i + 2]) and index.lookup(tokens[i + 1]):
+                    group_tokens.append(tokens[i + 2])
+                parsed["group"] = group_tokens
+                skip.update(range(i + 1, i + 1 + len(group_tokens)))
+                content += len(group_tokens)
+                recognized += 1 + len(group_tokens)
+                continue
+
+            if token.endswith("별") and len(token) > 1:
+                # "상태별", "카테고리별"
+                parsed["group"] = [token[:-1]]
+                recognized += 1
+                continue
+
+            matches = index.lookup(token)
+            if matches:
+                recognized += 1
+                for kind, table, column, weight in matches:
+                    if kind == "table":
+                        parsed["tables"].append((table, weight))
+                    else:
+                        parsed["columns"].append((table, column, weight))
+                if all(kind == "column" for kind, _, _, _ in matches):
+                    parsed["column_mentions"].append([(table, column) for _, table, column, _ in matches])
+                continue
+
+            value_matches = index.lookup_value(token)
+            if value_matches:
+                recognized += 1
+                parsed["values"].append((_base(token), value_matches))
+                continue
+
+            if token.startswith("총") and len(token) > 1:
+                # "총매출", "총급여"
+                parsed["sum"] = True
+                rest = token[1:]
+                if rest in MEASURE_SYNONYMS:
+                    parsed["measure_terms"].append(rest)
+                    recognized += 1
+                elif index.lookup(rest):
+                    recognized += 1
+                    parsed["columns"].extend((t, c, w) for k, t, c, w in index.lookup(rest) if k == "column")
+                continue
+
+        if content == 0:
+            return None
+
+        # 건수 지정("최근 5건", "latest 5")으로 확실한 숫자만 LIMIT으로 사용, 그 밖의 숫자(사용자 ID, 연도 등)가 있으면 포기
+        limits = [int(number.group(1)) for i, number in numbers if _is_limit_number(tokens, i, number)]
+        if len(limits) != len(numbers) or len(limits) > 1:
+            return None
+        parsed["limit"] = limits[0] if limits else None
+
+        parsed["coverage"] = recognized / content
+        return parsed
+
+    # ===== Templates =====
+
+    def _build_latest(self, parsed: dict, index: SchemaTermIndex, database_info: dict):
+        # 그룹별 최신("사용자별 최근 5건")은 윈도 함수가 필요하므로 LLM에 맡김
+        if parsed["group"]:
+            return None
+        table, ambiguous = self._pick_table(parsed, index)
+        # 동점 테이블은 어느 쪽을 조회할지 알 수 없으므로 LLM에 맡김
+        if table is None or ambiguous:
+            return None
+
+        ts_column = self._pick_timestamp_column(table, parsed, index)
+        if ts_column is None:
+            return None
+        # 최신 기준이 아닌 컬럼 언급("by price")은 정렬/조건 의도일 수 있어 반영하지 못하면 포기
+        if any((table, ts_column) not in mention for mention in parsed["column_mentions"]):
+            return None
+
+        limit = parsed["limit"] or DEFAULT_LIMIT
+        filters = self._value_filters(parsed, [table], qualify=False) + self._mandatory_filters([table], index, database_info, qualify=False)
+
+        sql = f"SELECT *\nFROM {table}"
+        sql += _where(filters)
+        sql += f"\nORDER BY {ts_column} DESC\nLIMIT {limit};"
+
+        assumptions = [f"최신 기준 컬럼으로 {table}.{ts_column}을(를) 사용했습니다."]
+        certainty = 0.95
+        return sql, [table], f"최근 {limit}건의 {table} 조회", assumptions, certainty
+
+    def _build_count(self, parsed: dict, index: SchemaTermIndex, database_info: dict):
+        group = self._resolve_group(parsed, index)
+        table, ambiguous = self._pick_table(parsed, index, exclude=group[0] if group and group[2] else None)
+        if table is None and group:
+            table, ambiguous = group[0], False
+        if table is None or ambiguous:
+            return None
+
+        if group is None:
+            if parsed["group"]:
+                return None
+            filters = self._value_filters(parsed, [table], qualify=False) + self._mandatory_filters([table], index, database_info, qualify=False)
+            sql = f"SELECT COUNT(*) AS count\nFROM {table}" + _where(filters) + ";"
+            certainty = 0.95
+            return sql, [table], f"{table} 건수 조회", [], certainty
+
+        joined = self._join_clause(table, group[0], index)
+        if joined is None:
+            return None
+        join_sql, tables_used = joined
+        qualify = len(tables_used) > 1
+        group_expr = f"{group[0]}.{group[1]}" if qualify else group[1]
+
+        filters = self._value_filters(parsed, tables_used, qualify) + self._mandatory_filters(tables_used, index, database_info, qualify)
+        sql = f"SELECT {group_expr}, COUNT(*) AS count\nFROM {table}{join_sql}"
+        sql += _where(filters)
+        sql += f"\nGROUP BY {group_expr}\nORDER BY count DESC;"
+
+        certainty = 0.95 * (0.97 ** (len(tables_used) - 1))
+        return sql, tables_used, f"{group[0]}.{group[1]}별 {table} 건수 집계", [], certainty
+
+    def _build_sum(self, parsed: dict, index: SchemaTermIndex, database_info: dict):
+        group = self._resolve_group(parsed, index)
+        if group is None:
+            return None
+
+        # 측정 컬럼: 요청에 직접 언급된 숫자 컬럼 우선, 없으면 금액 유형 컬럼 후보
+        candidates = []
+        for table, column, weight in parsed["columns"]:
+            col = index.columns[table][column]
+            if _is_measure(col):
+                candidates.append((10 + weight, table, column))
+        if not candidates and (parsed["measure_terms"] or parsed["sum"]):
+            for table, columns in index.columns.items():
+                names = set(columns)
+                qty = next((n for n in names if "quantity" in n or n == "qty"), None)
+                price = next((n for n in names if n in ("unit_price", "price")), None)
+                if qty and price:
+                    candidates.append((2, table, f"{qty} * {price}"))
+                for name, col in columns.items():
+                    if not _is_measure(col):
+                        continue
+                    rank = next((r for key, r in AMOUNT_NAME_RANKS if key in name), 0)
+                    if rank:
+                        candidates.append((rank, table, name))
+        if not candidates:
+            return None
+
+        best = None
+        for rank, table, measure in candidates:
+            path = index.join_path(table, group[0])
+            if path is None:
+                continue
+            key = (rank, -len(path))
+            if best is None or key > best[0]:
+                best = (key, table, measure, len(path))
+        if best is None:
+            return None
+        _, table, measure, hops = best
+
+        joined = self._join_clause(table, group[0], index)
+        join_sql, tables_used = joined
+        qualify = len(tables_used) > 1
+        group_expr = f"{group[0]}.{group[1]}" if qualify else group[1]
+        if qualify:
+            measure_expr = " * ".join(f"{table}.{part.strip()}" for part in measure.split("*"))
+        else:
+            measure_expr = measure
+
+        filters = self._value_filters(parsed, tables_used, qualify) + self._mandatory_filters(tables_used, index, database_info, qualify)
+        sql = f"SELECT {group_expr}, SUM({measure_expr}) AS total\nFROM {table}{join_sql}"
+        sql += _where(filters)
+        sql += f"\nGROUP BY {group_expr}\nORDER BY total DESC;"
+
+        direct = any(r >= 10 for r, _, _ in candidates)
+        assumptions = [f"합계 대상으로 {table}.{measure}을(를) 사용했습니다."]
+        certainty = (0.95 if direct else 0.9) * (0.97 ** hops)
+        return sql, tables_used, f"{group[0]}.{group[1]}별 {measure} 합계", assumptions, certainty
+
+    # ===== Helpers =====
+
+    def _pick_table(self, parsed: dict, index: SchemaTermIndex, exclude: Optional[str] = None) -> Tuple[Optional[str], bool]:
+        """가장 강하게 언급된 테이블 (동점이면 모호함 표시)"""
+        scores: Dict[str, float] = {}
+        for table, weight in parsed["tables"]:
+            if table != exclude:
+                scores[table] = max(scores.get(table, 0), weight)
+        if not scores:
+            return None, False
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        ambiguous = len(ranked) > 1 and ranked[0][1] == ranked[1][1]
+        return ranked[0][0], ambiguous
+
+    def _resolve_group(self, parsed: dict, index: SchemaTermIndex) -> Optional[Tuple[str, str, bool]]:
+        """그룹 기준 → (테이블, 컬럼, 테이블 자체를 기준으로 했는지)"""
+        if not parsed["group"]:
+            return None
+
+        tokens = parsed["group"]
+        if len(tokens) == 2:
+            tables = [t for k, t, c, w in index.lookup(tokens[0]) if k == "table"]
+            for kind, table, column, weight in index.lookup(tokens[1]):
+                if kind == "column" and table in tables:
+                    return table, column, False
+
+        matches = index.lookup(tokens[0])
+        if not matches:
+            return None
+
+        mentioned = {t for t, _ in parsed["tables"]}
+        ranked = sorted(matches, key=lambda m: (m[1] in mentioned, m[3], m[0] == "table"), reverse=True)
+        kind, table, column, _ = ranked[0]
+        if kind == "column":
+            # "카테고리별" → products.category_id 보다 참조 테이블 categories의 이름 컬럼
+            fk = index.columns[table][column].foreign_key
+            if fk and any(k == "table" and t == fk[0] for k, t, c, w in matches):
+                kind, table = "table", fk[0]
+        if kind == "table":
+            label = self._label_column(table, index)
+            return (table, label, True) if label else None
+        return table, column, False
+
+    def _label_column(self, table: str, index: SchemaTermIndex) -> Optional[str]:
+        columns = index.columns[table]
+        for name in LABEL_COLUMN_NAMES:
+            if name in columns:
+                return name
+        for name, col in columns.items():
+            if "CHAR" in col.data_type.upper() or "TEXT" in col.data_type.upper():
+                return name
+        return next(iter(columns), None)
+
+    def _pick_timestamp_column(self, table: str, parsed: dict, index: SchemaTermIndex) -> Optional[str]:
+        mentioned = {c for t, c, _ in parsed["columns"] if t == table}
+        best = None
+        for name, col in index.columns[table].items():
+            data_type = col.data_type.upper()
+            if "DATE" not in data_type and "TIME" not in data_type:
+                continue
+            score = 0
+            if name in mentioned:
+                score += 10
+            if "TIMESTAMP" in data_type or "DATETIME" in data_type:
+                score += 3
+            elif "DATE" in data_type:
+                score += 2
+            if "created" in name or name.endswith("_date") or name.endswith("_at"):
+                score += 1
+            if best is None or score > best[0]:
+                best = (score, name)
+        return best[1] if best else None
+
+    def _join_clause(self, source: str, target: str, index: SchemaTermIndex) -> Optional[Tuple[str, List[str]]]:
+        path = index.join_path(source, target)
+        if path is None:
+            return None
+        sql = ""
+        tables = [source]
+        for from_table, from_col, to_table, to_col in path:
+            sql += f"\nJOIN {to_table} ON {from_table}.{from_col} = {to_table}.{to_col}"
+            tables.append(to_table)
+        return sql, tables
+
+    def _value_filters(self, parsed: dict, tables: List[str], qualify: bool) -> List[str]:
+        filters = []
+        for value, targets in parsed["values"]:
+            for table, column in targets:
+                if table in tables:
+                    filters.append(f"{table + '.' if qualify else ''}{column} = '{value}'")
+                    break
+        return filters
+
+    def _mandatory_filters(self, tables: List[str], index: SchemaTermIndex, database_info: dict, qualify: bool) -> List[str]:
+        """soft delete 규칙 및 필수 필터 중 해당 테이블에 컬럼이 있는 것만 적용"""
+        constraints = database_info.get("constraints") or {}
+        rules = list(constraints.get("mandatory_filters") or [])
+        if constraints.get("soft_delete_rule") and constraints["soft_delete_rule"] not in rules:
+            rules.append(constraints["soft_delete_rule"])
+
+        filters = []
+        for rule in rules:
+            match = re.match(r"^\s*(\w+)\s*(.+)$", rule)
+            if not match:
+                continue
+            column, condition = match.groups()
+            literals = QUOTED_VALUE_PATTERN.findall(condition)
+            for table in tables:
+                if column not in index.columns[table]:
+                    continue
+                # 허용 값 목록에 없는 값을 비교하는 규칙은 다른 테이블용 ("status != 'resigned'")
+                allowed = index.enumerated_values(index.columns[table][column])
+                if allowed and any(literal not in allowed for literal in literals):
+                    continue
+                filters.append(f"{table + '.' if qualify else ''}{column} {condition.strip()}")
+        return filters
+
+
+def _is_latest_keyword(token: str) -> bool:
+    return token in LATEST_KEYWORDS or _base(token) in LATEST_KEYWORDS
+
+
+def _is_limit_number(tokens: List[str], i: int, number: re.Match) -> bool:
+    """최신 키워드 바로 앞/뒤의 숫자이거나 건수 단위(개, 건, rows)가 붙은 숫자"""
+    if number.group(2) in ("개", "건", "row", "rows"):
+        return True
+    return any(0 <= j < len(tokens) and _is_latest_keyword(tokens[j]) for j in (i - 1, i + 1))
+
+
+def _has_unsupported_modifier(tokens: List[str]) -> bool:
+    for i, token in enumerate(tokens):
+        base = _base(token)
+        if token in SORT_KEYWORDS or base in SORT_KEYWORDS or token.startswith("정렬"):
+            return True
+        if token == "order" and i + 1 < len(tokens) and tokens[i + 1] == "by":
+            return True
+        if token in NEGATION_KEYWORDS or base in NEGATION_KEYWORDS or token.startswith(NEGATION_PREFIXES):
+            return True
+    return False
+
+
+def _where(filters: List[str]) -> str:
+    return "\nWHERE " + "\n  AND ".join(filters) if filters else ""
+
+
+def _is_measure(col: ColumnInfo) -> bool:
+    name = col.name.lower()
+    data_type = col.data_type.upper()
+    if col.primary_key or col.foreign_key or name == "id" or name.endswith("_id"):
+        return False
+    return any(t in data_type for t in NUMERIC_TYPES) and "SERIAL" not in data_type
+
+
+def _singular(word: str) -> str:
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith("ses") and len(word) > 4:
+        return word[:-2]
+    if word.endswith("s") and not word.endswith("ss") and len(word) > 3:
+        return word[:-1]
+    return word
+
+
+def _base(token: str) -> str:
+    """한국어 조사를 제거한 기본형"""
+    for suffix in KOREAN_SUFFIXES:
+        if token.endswith(suffix) and len(token) > len(suffix) + 1:
+            return token[:-len(suffix)]
+    return token
+
+
+def _token_variants(token: str) -> List[str]:
+    variants = [token, _singular(token)]
+    base = _base(token)
+    if base != token:
+        variants.append(base)
+    return variants
+
+
+# 싱글톤 인스턴스
+rule_engine = RuleBasedGenerator()
@@ -0,0 +1,215 @@
+"""
+Schema Catalog
+메타데이터를 __slots__ 객체 기반의 압축 카탈로그로 보관하고 테이블/컬럼/FK 조인 경로를 O(1)로 조회
+"""
+
+import sys
+import difflib
+import hashlib
+from collections import OrderedDict
+from typing import Optional, Dict, List, Tuple, Any, Iterable, KeysView
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    # 테이블/컬럼명, 타입, 반복되는 설명은 워커 안에서 한 번만 저장
+    return sys.intern(value) if value else value
+
+
+class ColumnInfo:
+    """단일 컬럼 (dict 대신 고정 슬롯으로 키 문자열 중복 제거)"""
+
+    __slots__ = ("name", "data_type", "nullable", "description", "primary_key", "foreign_key", "stats")
+
+    def __init__(self, name: str, data_type: str, nullable: bool = True, description: str = "",
+                 primary_key: bool = False, foreign_key: Optional[Tuple[str, Optional[str]]] = None,
+                 stats: Optional[Tuple[Optional[int], Optional[float]]] = None):
+        self.name = _intern(name)
+        self.data_type = _intern(data_type)
+        self.nullable = nullable
+        self.description = _intern(description or "")
+        self.primary_key = primary_key
+        self.foreign_key = foreign_key  # (ref_table, ref_column)
+        self.stats = stats  # (distinct_estimate, null_fraction)
+
+    @classmethod
+    def from_dict(cls, col: Dict[str, Any]) -> "ColumnInfo":
+        fk = col.get("foreign_key")
+        stats = col.get("stats")
+        return cls(
+            col["column_name"],
+            col.get("data_type") or "",
+            col.get("nullable", True),
+            col.get("description") or "",
+            bool(col.get("primary_key", False)),
+            (_intern(fk["ref_table"]), _intern(fk.get("ref_column"))) if fk and fk.get("ref_table") else None,
+            (stats.get("distinct_estimate"), stats.get("null_fraction")) if stats else None
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        col = {
+            "column_name": self.name,
+            "data_type": self.data_type,
+            "nullable": self.nullable,
+            "description": self.description,
+            "primary_key": self.primary_key
+        }
+        if self.foreign_key:
+            col["foreign_key"] = {"ref_table": self.foreign_key[0], "ref_column": self.foreign_key[1]}
+        if self.stats:
+            col["stats"] = {"distinct_estimate": self.stats[0], "null_fraction": self.stats[1]}
+        return col
+
+
+class TableInfo:
+    """단일 테이블 (컬럼 튜플 + 소문자 이름 기준 조회 맵)"""
+
+    __slots__ = ("name", "description", "estimated_rows", "indexes", "columns", "column_map")
+
+    def __init__(self, name: str, description: str = "", estimated_rows: Optional[int] = None,
+                 indexes: Iterable[Tuple[str, Tuple[str, ...], bool, bool]] = (),
+                 columns: Iterable[ColumnInfo] = ()):
+        self.name = _intern(name)
+        self.description = _intern(description or "")
+        self.estimated_rows = estimated_rows
+        self.indexes = tuple(indexes)  # (name, columns, unique, primary_key)
+        self.columns = tuple(columns)
+        self.column_map: Dict[str, ColumnInfo] = {_intern(col.name.lower()): col for col in self.columns}
+
+    @classmethod
+    def from_dict(cls, table: Dict[str, Any]) -> "TableInfo":
+        return cls(
+            table["table_name"],
+            table.get("description") or "",
+            table.get("estimated_rows"),
+            (
+                (_intern(idx.get("name")), tuple(_intern(c) for c in idx.get("columns", [])),
+                 bool(idx.get("unique", False)), bool(idx.get("primary_key", False)))
+                for idx in table.get("indexes") or []
+            ),
+            (ColumnInfo.from_dict(col) for col in table.get("columns", []))
+        )
+
+    def column(self, column_name: str) -> Optional[ColumnInfo]:
+        return self.column_map.get(column_name.lower())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "table_name": self.name,
+            "description": self.description,
+            "estimated_rows": self.estimated_rows,
+            "indexes": [
+                {"name": name, "columns": list(columns), "unique": unique, **({"primary_key": True} if pk else {})}
+                for name, columns, unique, pk in self.indexes
+            ],
+            "columns": [col.to_dict() for col in self.columns]
+        }
+
+    def relationships(self) -> List[str]:
+        return [
+            f"{self.name}.{col.name} → {col.foreign_key[0]}.{col.foreign_key[1] or '?'}"
+            for col in self.columns if col.foreign_key
+        ]
+
+
+class SchemaCatalog:
+    """테이블/컬럼 존재 여부와 FK 조인 조건을 O(1)로 조회하는 카탈로그"""
+
+    def __init__(self, tables: Iterable[TableInfo], db_type: str = "", db_version: str = "",
+                 relationships: Iterable[str] = (), constraints: Optional[Dict[str, Any]] = None):
+        self.db_type = db_type
+        self.db_version = db_version
+        self.constraints = constraints or {}
+        # 소문자 이름 기준 (PostgreSQL은 따옴표 없는 식별자를 소문자로 처리)
+        self.tables: Dict[str, TableInfo] = {}
+        # (table, other_table) → [(table.column, other_table.column)]
+        self.fk_joins: Dict[Tuple[str, str], List[Tuple[str, str]]] = {}
+
+        for table in tables:
+            table_name = table.name.lower()
+            self.tables[table_name] = table
+            for col in table.columns:
+                if not col.foreign_key:
+                    continue
+                ref_table = col.foreign_key[0].lower()
+                left = f"{table_name}.{col.name.lower()}"
+                right = f"{ref_table}.{(col.foreign_key[1] or 'id').lower()}"
+                self.fk_joins.setdefault((table_name, ref_table), []).append((left, right))
+                if ref_table != table_name:
+                    self.fk_joins.setdefault((ref_table, table_name), []).append((right, left))
+
+        self.relationships = tuple(relationships) or tuple(r for t in self.tables.values() for r in t.relationships())
+
+        # 같은 스키마인지 판별하는 지문 (템플릿 캐시 키 등에 사용)
+        signature = repr((
+            db_type.lower(),
+            sorted((name, sorted(table.column_map)) for name, table in self.tables.items())
+        ))
+        self.fingerprint = hashlib.sha1(signature.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def from_metadata(cls, database_info: dict) -> "SchemaCatalog":
+        summary = database_info.get("schema_summary", {})
+        return cls(
+            (TableInfo.from_dict(table) for table in summary.get("tables", [])),
+            database_info.get("db_type") or "",
+            database_info.get("db_version") or "",
+            summary.get("relationships") or (),
+            database_info.get("constraints")
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """API 응답/프롬프트용 기존 메타데이터 dict 형태 (필요할 때만 생성)"""
+        return {
+            "db_type": self.db_type,
+            "db_version": self.db_version,
+            "schema_summary": {
+                "tables": [table.to_dict() for table in self.tables.values()],
+                "relationships": list(self.relationships)
+            },
+            "constraints": self.constraints
+        }
+
+    def __len__(self) -> int:
+        return len(self.tables)
+
+    def get_table(self, table_name: str) -> Optional[TableInfo]:
+        return self.tables.get(table_name.lower())
+
+    def has_table(self, table_name: str) -> bool:
+        return table_name.lower() in self.tables
+
+    def columns(self, table_name: str) -> Optional[KeysView]:
+        table = self.tables.get(table_name.lower())
+        return table.column_map.keys() if table else None
+
+    def join_conditions(self, table_a: str, table_b: str) -> List[str]:
+        """두 테이블 사이의 FK 조인 조건 목록"""
+        return [f"{left} = {right}" for left, right in self.fk_joins.get((table_a.lower(), table_b.lower()), [])]
+
+    def similar_names(self, name: str, candidates: Iterable[str], limit: int = 3) -> List[str]:
+        """오타 수정 힌트용 유사 이름"""
+        return difflib.get_close_matches(name.lower(), sorted(candidates), n=limit, cutoff=0.6)
+
+
+# id(database_info) → (database_info, catalog); 객체를 함께 보관하여 id 재사용 방지 (LRU)
+_catalog_cache: "OrderedDict[int, Tuple[dict, SchemaCatalog]]" = OrderedDict()
+MAX_CACHED_CATALOGS = 8
+
+
+def get_catalog(database_info: dict) -> SchemaCatalog:
+    """메타데이터별 카탈로그 (같은 메타데이터 객체는 재사용)"""
+    cached = _catalog_cache.get(id(database_info))
+    if cached and cached[0] is database_info:
+        _catalog_cache.move_to_end(id(database_info))
+        return cached[1]
+    catalog = SchemaCatalog.from_metadata(database_info)
+    register_catalog(database_info, catalog)
+    return catalog
+
+
+def register_catalog(database_info: dict, catalog: SchemaCatalog):
+    """catalog.to_dict()로 만든 메타데이터에 원본 카탈로그를 연결 (다시 파싱하지 않도록)"""
+    _catalog_cache[id(database_info)] = (database_info, catalog)
+    _catalog_cache.move_to_end(id(database_info))
+    while len(_catalog_cache) > MAX_CACHED_CATALOGS:
+        _catalog_cache.popitem(last=False)
@@ -6,20 +6,26 @@ LLM 기반 자연어 → SQL 변환 서비스
 import os
 import re
 import json
-from typing import Optional
-import google.generativeai as genai
-from openai import OpenAI
+import threading
+import orjson
+from typing import Optional, Callable
 from dotenv import load_dotenv
 
+# 로컬 모듈의 환경 변수 상수(캐시 크기, 대기열 설정 등)도 .env 값을 읽도록 import 전에 로드
 load_dotenv()
 
+from rule_engine import rule_engine
+from sql_validator import sql_validator
+from query_templates import query_templates
+from schema_catalog import get_catalog
+from admission import admission, AdmissionRejected
+from profiling import span
+from refine_sessions import refine_sessions, RefinementSession
+
 # API Keys
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-
 SYSTEM_PROMPT = """
 당신은 SQL 전문가입니다. 제공된 데이터베이스 메타데이터를 사용하여 사용자의 자연어 질문을 최적화된 SQL로 변환하세요.
 반드시 아래 JSON 구조를 따라야 하며, 다른 텍스트 없이 JSON만 응답하세요:
@@ -37,6 +43,15 @@ SYSTEM_PROMPT = """
 당신은 데이터베이스의 모든 기능을 자유롭게 사용할 수 있습니다.
 """
 
+# 이 행 수 이상이면 프롬프트에서 대용량 테이블로 표시
+LARGE_TABLE_ROWS = int(os.getenv("LARGE_TABLE_ROWS", "1000000"))
+
+# 규칙 기반 빠른 경로 결과를 LLM 대신 사용할 최소 신뢰도
+FAST_PATH_MIN_CONFIDENCE = float(os.getenv("FAST_PATH_MIN_CONFIDENCE", "0.8"))
+
+# EXPLAIN 예상 비용이 이 값을 넘으면 실행 계획 기반 재작성 시도
+PLAN_COST_THRESHOLD = float(os.getenv("PLAN_COST_THRESHOLD", "100000"))
+
 ETL_PROMPT_ADDITION = """
 추가로 ETL 파이프라인 정보도 포함하세요. JSON 응답에 "etl_pipeline" 필드를 추가하세요:
 {
@@ -48,68 +63,270 @@ ETL_PROMPT_ADDITION = """
 }
 """
 
+# 세션 후속 요청 턴 (직전 SQL과 스키마는 대화 앞부분에 이미 있으므로 변경 요청만 전송)
+REFINE_TURN_PROMPT = """
+### 후속 요청:
+{request}
+
+직전에 생성한 SQL을 위 요청에 맞게 수정하세요. 언급되지 않은 기존 조건과 컬럼은 유지하세요. 반드시 JSON 형식으로만 응답하세요.
+"""
+
+# LLM 응답 JSON 스키마 (SQLGenerateResponse와 동일 구조, OpenAI strict 모드 형식)
+SQL_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "intent_summary": {"type": "string"},
+        "sql": {"type": ["string", "null"]},
+        "assumptions": {"type": "array", "items": {"type": "string"}},
+        "safety_notes": {"type": "array", "items": {"type": "string"}},
+        "tables_used": {"type": "array", "items": {"type": "string"}},
+        "is_blocked": {"type": "boolean"},
+        "block_reason": {"type": ["string", "null"]}
+    },
+    "required": ["intent_summary", "sql", "assumptions", "safety_notes", "tables_used", "is_blocked", "block_reason"],
+    "additionalProperties": False
+}
+
+ETL_PIPELINE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "extract": {
+            "type": "object",
+            "properties": {
+                "source_tables": {"type": "array", "items": {"type": "string"}},
+                "conditions": {"type": "string"}
+            },
+            "required": ["source_tables", "conditions"],
+            "additionalProperties": False
+        },
+        "transform": {"type": "array", "items": {"type": "string"}},
+        "load": {
+            "type": "object",
+            "properties": {
+                "target_table": {"type": "string"},
+                "write_mode": {"type": "string", "enum": ["append", "overwrite"]}
+            },
+            "required": ["target_table", "write_mode"],
+            "additionalProperties": False
+        }
+    },
+    "required": ["extract", "transform", "load"],
+    "additionalProperties": False
+}
+
+
+def _with_etl_schema(schema: dict) -> dict:
+    """ETL 파이프라인 필드를 추가한 응답 스키마"""
+    return {
+        **schema,
+        "properties": {**schema["properties"], "etl_pipeline": ETL_PIPELINE_SCHEMA},
+        "required": schema["required"] + ["etl_pipeline"]
+    }
+
+
+def _to_gemini_schema(schema: dict) -> dict:
+    """JSON Schema를 Gemini response_schema(OpenAPI 부분집합) 형식으로 변환"""
+    converted = {}
+    for key, value in schema.items():
+        if key == "additionalProperties":
+            continue
+        if key == "type" and isinstance(value, list):
+            converted["type"] = next(t for t in value if t != "null")
+            converted["nullable"] = "null" in value
+        elif key == "properties":
+            converted["properties"] = {name: _to_gemini_schema(prop) for name, prop in value.items()}
+        elif key == "items":
+            converted["items"] = _to_gemini_schema(value)
+        else:
+            converted[key] = value
+    return converted
+
+
+# (provider, include_etl) → 구조화 출력 스키마 (모듈 로드 시 1회 생성)
+RESPONSE_SCHEMAS = {
+    ("openai", False): SQL_RESPONSE_SCHEMA,
+    ("openai", True): _with_etl_schema(SQL_RESPONSE_SCHEMA),
+    ("google", False): _to_gemini_schema(SQL_RESPONSE_SCHEMA),
+    ("google", True): _to_gemini_schema(_with_etl_schema(SQL_RESPONSE_SCHEMA)),
+}
+
 class SQLGenerator:
     def __init__(self):
-        self.gemini_model = None
-        self.openai_client = None
-        
-        if GEMINI_API_KEY:
-            self.gemini_model = genai.GenerativeModel(
-                'gemini-3.0-flash',
-                generation_config={"response_mime_type": "application/json"}
-            )
-            
-        if OPENAI_API_KEY:
-            self.openai_client = OpenAI(api_key=OPENAI_API_KEY)
+        # 공급자 SDK import와 클라이언트 생성은 처음 사용할 때 (워커 기동 시간 단축, --preload 후 fork 안전)
+        self._gemini_model = None
+        self._openai_client = None
+        self._client_lock = threading.Lock()
+        if hasattr(os, "register_at_fork"):
+            # 마스터에서 만들어진 클라이언트의 커넥션 풀을 자식 워커가 공유하지 않도록 초기화
+            os.register_at_fork(after_in_child=self._reset_clients)
+
+    def _reset_clients(self):
+        self._gemini_model = None
+        self._openai_client = None
+        self._client_lock = threading.Lock()
+
+    @property
+    def gemini_model(self):
+        if self._gemini_model is None and GEMINI_API_KEY:
+            with self._client_lock:
+                if self._gemini_model is None:
+                    import google.generativeai as genai
+                    genai.configure(api_key=GEMINI_API_KEY)
+                    self._gemini_model = genai.GenerativeModel(
+                        'gemini-3.0-flash',
+                        generation_config={"response_mime_type": "application/json"}
+                    )
+        return self._gemini_model
+
+    @gemini_model.setter
+    def gemini_model(self, model):
+        self._gemini_model = model
+
+    @property
+    def openai_client(self):
+        if self._openai_client is None and OPENAI_API_KEY:
+            with self._client_lock:
+                if self._openai_client is None:
+                    from openai import OpenAI
+                    self._openai_client = OpenAI(api_key=OPENAI_API_KEY)
+        return self._openai_client
+
+    @openai_client.setter
+    def openai_client(self, client):
+        self._openai_client = client
     
     def _validate_sql_safety(self, sql: str) -> tuple[bool, Optional[str]]:
         # 데모 환경이므로 모든 쿼리를 허용합니다.
         return True, None
     
-    def generate_sql(self, user_request: str, database_info: dict, include_etl: bool = False, provider: str = "openai", model_name: str = "gpt-5-mini-2025-08-07") -> dict:
+    def generate_sql(self, user_request: str, database_info: dict, include_etl: bool = False, provider: str = "openai", model_name: str = "gpt-5-mini-2025-08-07", plan_checker: Optional[Callable[[str], dict]] = None) -> dict:
         """자연어 요청을 SQL로 변환"""
-        print(f"--- Calling LLM (SQL) | Provider: {provider} | Model: {model_name} ---")
+        # 단순 요청은 규칙 기반 빠른 경로로 처리 (ETL 파이프라인은 LLM 필요)
+        result = None
+        if not include_etl:
+            with span("fast_path"):
+                fast_result = rule_engine.generate(user_request, database_info)
+            if (fast_result and fast_result["confidence"] >= FAST_PATH_MIN_CONFIDENCE
+                    and not sql_validator.validate(fast_result["sql"], database_info)):
+                print(f"--- Rule-based fast path (SQL) | Confidence: {fast_result['confidence']} ---")
+                result = fast_result
+
+        # 리터럴만 다른 이전 요청의 템플릿 재사용
+        if result is None and not include_etl:
+            with span("template_lookup"):
+                result = query_templates.lookup(user_request, database_info)
+            if result is not None:
+                print("--- Reusing parameterized query template (SQL) ---")
+
+        llm_generated = result is None
+        if result is None:
+            print(f"--- Calling LLM (SQL) | Provider: {provider} | Model: {model_name} ---")
         
-        # Dispatch based on provider
-        if provider == "openai":
-            if not self.openai_client:
-                 return self._generate_demo_response(user_request, database_info, include_etl, "OpenAI API Key provided not found")
-            return self._generate_sql_openai(user_request, database_info, include_etl, model_name)
-        else:
-            # Default to Google
-            if not self.gemini_model:
-                return self._generate_demo_response(user_request, database_info, include_etl, "Gemini API Key provided not found")
-            return self._generate_sql_gemini(user_request, database_info, include_etl, model_name)
+            # Dispatch based on provider
+            if provider == "openai":
+                if not self.openai_client:
+                     return self._generate_demo_response(user_request, database_info, include_etl, "OpenAI API Key provided not found")
+                result = self._generate_sql_openai(user_request, database_info, include_etl, model_name)
+            else:
+                # Default to Google
+                if not self.gemini_model:
+                    return self._generate_demo_response(user_request, database_info, include_etl, "Gemini API Key provided not found")
+                result = self._generate_sql_gemini(user_request, database_info, include_etl, model_name)
 
-    def _generate_sql_gemini(self, user_request: str, database_info: dict, include_etl: bool, model_name: str) -> dict:
-        # 프롬프트 구성
-        prompt = SYSTEM_PROMPT
+            # 스키마 검증 (DB 왕복 없이 존재하지 않는 테이블/컬럼 참조 확인 후 1회 자동 수정)
+            if result.get("sql") and not result.get("is_blocked"):
+                result = self._validate_and_repair(result, user_request, database_info, include_etl, provider, model_name)
+
+        # 실행 계획 검사 (선택)
+        if plan_checker and result.get("sql") and not result.get("is_blocked"):
+            result = self._check_plan_and_rewrite(result, user_request, database_info, include_etl, provider, model_name, plan_checker)
+
+        # 검증을 통과한 LLM 결과만 템플릿으로 저장
+        if llm_generated and not include_etl and result.get("sql") and not any(
+            note.startswith("스키마 검증 실패") for note in result.get("safety_notes", [])
+        ):
+            query_templates.store(user_request, database_info, result)
+
+        # 후속 요청용 세션은 LLM 결과만 생성 (규칙/템플릿 결과의 후속 요청은 원래 요청과 합쳐 새로 생성)
+        if llm_generated:
+            result["session_id"] = self.start_session(user_request, database_info, result, include_etl, provider, model_name)
+        return result
+
+    def start_session(self, user_request: str, database_info: dict, result: dict, include_etl: bool, provider: str, model_name: str) -> Optional[str]:
+        """첫 생성 결과로 후속 요청용 세션 생성 (스키마가 담긴 첫 턴을 공급자에 보낸 형태 그대로 보관)"""
+        if not result.get("sql") or result.get("is_blocked"):
+            return None
+        session = refine_sessions.create(database_info, include_etl, provider, model_name)
+        session.add_turn(
+            user_request,
+            self._build_user_content(user_request, database_info),
+            self._assistant_content(result, include_etl),
+            result
+        )
+        refine_sessions.save(session)
+        return session.id
+
+    def refine_sql(self, session: RefinementSession, user_request: str, plan_checker: Optional[Callable[[str], dict]] = None) -> dict:
+        """세션의 스키마/직전 SQL/대화 내역을 기준으로 후속 요청 반영 (새 턴만 덧붙여 전송)"""
+        database_info, include_etl = session.database_info, session.include_etl
+        provider, model_name = session.provider, session.model_name
+        print(f"--- Calling LLM (Refine) | Provider: {provider} | Model: {model_name} | Turn: {len(session.requests) + 1} ---")
+
+        if not self._has_client(provider):
+            return self._generate_demo_response(user_request, database_info, include_etl, "API Key provided not found")
+
+        system_content = SYSTEM_PROMPT
         if include_etl:
-            prompt += ETL_PROMPT_ADDITION
-        
-        prompt += f"""
+            system_content += ETL_PROMPT_ADDITION
+        user_content = REFINE_TURN_PROMPT.format(request=user_request)
+        try:
+            response_text = self._complete(provider, model_name, system_content, user_content, include_etl, history=session.messages)
+            with span("parse"):
+                result = self._parse_llm_response(response_text)
+        except AdmissionRejected:
+            raise
+        except Exception as e:
+            return self._error_response(str(e))
 
-## 입력 데이터
+        # 검증/재작성 프롬프트에는 지금까지의 요청 전체를 전달
+        history = session.request_history() + f"\n(후속) {user_request}"
+        if result.get("sql") and not result.get("is_blocked"):
+            result = self._validate_and_repair(result, history, database_info, include_etl, provider, model_name)
+        if plan_checker and result.get("sql") and not result.get("is_blocked"):
+            result = self._check_plan_and_rewrite(result, history, database_info, include_etl, provider, model_name, plan_checker)
 
-### Database Info:
-```json
-{json.dumps(database_info, ensure_ascii=False, indent=2)}
-```
+        if result.get("sql") and not result.get("is_blocked"):
+            session.add_turn(user_request, user_content, self._assistant_content(result, include_etl), result)
+            if not refine_sessions.save(session):
+                # 같은 세션의 다른 후속 요청이 먼저 저장됨 (결과는 반환하되 대화 내역에는 남기지 않음)
+                print(f"--- Refine session {session.id} changed concurrently; turn not recorded ---")
+        return result
 
-### 사용자 요청:
-{user_request}
+    def _assistant_content(self, result: dict, include_etl: bool) -> str:
+        """대화 내역에 남길 응답 (응답 스키마 필드만, 최종 SQL 기준)"""
+        fields = RESPONSE_SCHEMAS[("openai", include_etl)]["properties"]
+        return orjson.dumps({k: result.get(k) for k in fields}).decode()
 
-위 정보를 바탕으로 SQL을 생성하세요. 반드시 JSON 형식으로만 응답하세요.
-"""
+    def _generate_sql_gemini(self, user_request: str, database_info: dict, include_etl: bool, model_name: str) -> dict:
+        # 프롬프트 구성
+        system_content = SYSTEM_PROMPT
+        if include_etl:
+            system_content += ETL_PROMPT_ADDITION
+
+        with span("prompt"):
+            user_content = self._build_user_content(user_request, database_info)
         try:
             # Update model name if needed (though we init with a default, user might request specific)
             # For Gemini, we might create a new instance or just use the default. 
             # Given the requirement, we stick to the one we initialized or re-init if really needed.
             # But the user only asked for options.
             
-            response = self.gemini_model.generate_content(prompt)
-            return self._parse_llm_response(response.text)
+            response_text = self._complete("google", model_name, system_content, user_content, include_etl)
+            with span("parse"):
+                return self._parse_llm_response(response_text)
             
+        except AdmissionRejected:
+            raise
         except Exception as e:
             return self._error_response(str(e))
 
@@ -118,47 +335,256 @@ class SQLGenerator:
         if include_etl:
             system_content += ETL_PROMPT_ADDITION
 
-        user_content = f"""
-## 입력 데이터
+        with span("prompt"):
+            user_content = self._build_user_content(user_request, database_info)
+        try:
+            response_text = self._complete("openai", model_name, system_content, user_content, include_etl)
+            with span("parse"):
+                return self._parse_llm_response(response_text)
+        except AdmissionRejected:
+            raise
+        except Exception as e:
+            return self._error_response(str(e))
 
-### Database Info:
-```json
-{json.dumps(database_info, ensure_ascii=False, indent=2)}
-```
+    def _complete(self, provider: str, model_name: str, system_content: str, user_content: str, include_etl: bool = False, history: Optional[list[dict]] = None) -> str:
+        """공급자별 LLM 호출 후 응답 텍스트 반환 (응답 스키마로 출력 형식 고정, 호출 슬롯 확보 후 실행)"""
+        with admission.slot(), span("provider"):
+            return self._complete_unqueued(provider, model_name, system_content, user_content, include_etl, history or [])
 
-### 사용자 요청:
-{user_request}
+    def _complete_unqueued(self, provider: str, model_name: str, system_content: str, user_content: str, include_etl: bool, history: list[dict]) -> str:
+        if provider == "openai":
+            # Map demo model names to real API model names
+            real_model = model_name
+            # If it's a generic name, map to default nano. Otherwise use as is.
+            if model_name in ["openai", "gpt-5"]:
+                real_model = "gpt-5-nano-2025-08-07"
 
-위 정보를 바탕으로 SQL을 생성하세요. 반드시 JSON 형식으로만 응답하세요.
-"""
-        # Map demo model names to real API model names
-        real_model = model_name
-        # If it's a generic name, map to default nano. Otherwise use as is.
-        if model_name in ["openai", "gpt-5"]:
-            real_model = "gpt-5-nano-2025-08-07"
-        
-        try:
             completion = self.openai_client.chat.completions.create(
                 model=real_model,
                 messages=[
                     {"role": "system", "content": system_content},
+                    *history,
                     {"role": "user", "content": user_content}
                 ],
-                response_format={"type": "json_object"}
+                response_format={
+                    "type": "json_schema",
+                    "json_schema": {
+                        "name": "sql_generate_response",
+                        "strict": True,
+                        "schema": RESPONSE_SCHEMAS[("openai", include_etl)]
+                    }
+                }
             )
-            response_text = completion.choices[0].message.content
-            return self._parse_llm_response(response_text)
+            return completion.choices[0].message.content
+
+        if history:
+            # 첫 턴은 단일 요청과 같은 형태(시스템 프롬프트 + 첫 요청)로 보내 암묵적 프리픽스 캐시 적용
+            contents = [
+                {"role": "user" if m["role"] == "user" else "model",
+                 "parts": [system_content + "\n" + m["content"] if i == 0 else m["content"]]}
+                for i, m in enumerate(history)
+            ]
+            contents.append({"role": "user", "parts": [user_content]})
+        else:
+            contents = system_content + "\n" + user_content
+
+        response = self.gemini_model.generate_content(
+            contents,
+            generation_config={
+                "response_mime_type": "application/json",
+                "response_schema": RESPONSE_SCHEMAS[("google", include_etl)]
+            }
+        )
+        return response.text
+
+    def _check_plan_and_rewrite(self, result: dict, user_request: str, database_info: dict, include_etl: bool, provider: str, model_name: str, plan_checker: Callable[[str], dict]) -> dict:
+        """EXPLAIN 결과가 임계값을 넘으면 실행 계획을 LLM에 전달하여 1회 재작성"""
+        plan = plan_checker(result["sql"])
+        if not plan.get("success"):
+            result.setdefault("safety_notes", []).append(f"실행 계획 확인 실패: {plan.get('error')}")
+            return result
+
+        result["plan_cost"] = plan.get("total_cost")
+        result["plan_rows"] = plan.get("plan_rows")
+
+        problems = self._find_plan_problems(plan, database_info)
+        if not problems or not self._has_client(provider):
+            result.setdefault("safety_notes", []).extend(problems)
+            return result
+
+        rewritten = self._rewrite_sql(
+            result, user_request, database_info, include_etl, provider, model_name,
+            "EXPLAIN 결과 문제점", problems,
+            "위 문제를 해결하도록 SQL을 재작성하세요. 결과 의미는 동일해야 하며, 인덱스를 활용하고 대용량 테이블의 전체 스캔을 피하세요."
+        )
+        if rewritten is None or sql_validator.validate(rewritten["sql"], database_info):
+            result.setdefault("safety_notes", []).extend(problems)
+            return result
+
+        # 재작성된 SQL이 실제로 더 저렴할 때만 교체
+        new_plan = plan_checker(rewritten["sql"])
+        old_cost = plan.get("total_cost")
+        new_cost = new_plan.get("total_cost") if new_plan.get("success") else None
+        if new_cost is None or (old_cost is not None and new_cost >= old_cost):
+            result.setdefault("safety_notes", []).extend(problems)
+            return result
+
+        rewritten["plan_cost"] = new_cost
+        rewritten["plan_rows"] = new_plan.get("plan_rows")
+        rewritten.setdefault("safety_notes", []).append(
+            f"실행 계획 검사 후 재작성되었습니다. (예상 비용 {old_cost:,.0f} → {new_cost:,.0f})"
+        )
+        return rewritten
+
+    def _validate_and_repair(self, result: dict, user_request: str, database_info: dict, include_etl: bool, provider: str, model_name: str) -> dict:
+        """카탈로그 기준 검증 실패 시 오류와 FK 조인 힌트를 LLM에 전달하여 1회 자동 수정"""
+        errors = sql_validator.validate(result["sql"], database_info)
+        if not errors:
+            return result
+
+        problems = errors + [f"FK 조인 조건: {hint}" for hint in sql_validator.join_hints(result["sql"], database_info)]
+        repaired = self._rewrite_sql(
+            result, user_request, database_info, include_etl, provider, model_name,
+            "스키마 검증 오류", problems,
+            "Database Info에 존재하는 테이블과 컬럼만 사용하도록 SQL을 수정하세요. 요청 의도는 그대로 유지하세요."
+        )
+        remaining = sql_validator.validate(repaired["sql"], database_info) if repaired else errors
+        if repaired is None or remaining:
+            result.setdefault("safety_notes", []).extend(f"스키마 검증 실패: {e}" for e in remaining)
+            return result
+
+        repaired.setdefault("safety_notes", []).append(
+            f"스키마 검증 오류를 자동 수정했습니다. ({'; '.join(errors)})"
+        )
+        return repaired
+
+    def _rewrite_sql(self, result: dict, user_request: str, database_info: dict, include_etl: bool, provider: str, model_name: str, problem_title: str, problems: list[str], instruction: str) -> Optional[dict]:
+        """이전 SQL과 문제점을 함께 보내 재작성된 응답을 받음 (실패 시 None)"""
+        system_content = SYSTEM_PROMPT
+        if include_etl:
+            system_content += ETL_PROMPT_ADDITION
+        with span("prompt"):
+            user_content = self._build_user_content(user_request, database_info)
+        user_content += f"""
+### 이전에 생성한 SQL:
+```sql
+{result["sql"]}
+```
+
+### {problem_title}:
+{chr(10).join(f"- {p}" for p in problems)}
+
+{instruction}
+"""
+        try:
+            response_text = self._complete(provider, model_name, system_content, user_content, include_etl)
+            with span("parse"):
+                rewritten = self._parse_llm_response(response_text)
         except Exception as e:
-            return self._error_response(str(e))
+            result.setdefault("safety_notes", []).append(f"SQL 재작성 실패: {e}")
+            return None
+
+        if not rewritten.get("sql") or rewritten.get("is_blocked"):
+            return None
+        if include_etl and not rewritten.get("etl_pipeline"):
+            rewritten["etl_pipeline"] = result.get("etl_pipeline")
+        return rewritten
+
+    def _has_client(self, provider: str) -> bool:
+        return bool(self.openai_client if provider == "openai" else self.gemini_model)
+
+    def _find_plan_problems(self, plan: dict, database_info: dict) -> list[str]:
+        """예상 비용 초과 및 대용량 테이블 순차 스캔 탐지"""
+        problems = []
+        total_cost = plan.get("total_cost")
+        if total_cost is not None and total_cost > PLAN_COST_THRESHOLD:
+            problems.append(f"예상 비용 {total_cost:,.0f}이(가) 임계값 {PLAN_COST_THRESHOLD:,.0f}을(를) 초과합니다.")
+
+        catalog = get_catalog(database_info)
+        for scan in plan.get("seq_scans", []):
+            table = catalog.get_table(scan.get("table") or "")
+            rows = (table.estimated_rows if table else None) or scan.get("rows") or 0
+            if rows >= LARGE_TABLE_ROWS:
+                problems.append(f"대용량 테이블 {scan.get('table')}(약 {rows:,} rows)에 순차 스캔이 발생합니다.")
+        return problems
+
+    def _build_user_content(self, user_request: str, database_info: dict) -> str:
+        """메타데이터, 성능 힌트, 사용자 요청으로 입력 프롬프트 구성"""
+        performance_hints = self._build_performance_hints(database_info)
+        hints_section = f"""
+### Performance Hints:
+{performance_hints}
+""" if performance_hints else ""
+
+        return f"""
+## 입력 데이터
+
+### Database Info:
+```json
+{orjson.dumps(database_info, option=orjson.OPT_INDENT_2).decode()}
+```
+{hints_section}
+### 사용자 요청:
+{user_request}
+
+위 정보를 바탕으로 SQL을 생성하세요. 반드시 JSON 형식으로만 응답하세요.
+"""
+
+    def _build_performance_hints(self, database_info: dict) -> str:
+        """인덱스/행 수/선택도 통계를 프롬프트용 요약으로 변환"""
+        tables = database_info.get("schema_summary", {}).get("tables", [])
+        lines = []
+
+        for table in tables:
+            estimated_rows = table.get("estimated_rows")
+            indexes = table.get("indexes") or []
+            if estimated_rows is None and not indexes:
+                continue
+
+            parts = [f"- {table['table_name']}:"]
+            if estimated_rows is not None:
+                size_label = " (대용량, 전체 스캔 금지)" if estimated_rows >= LARGE_TABLE_ROWS else ""
+                parts.append(f"약 {estimated_rows:,} rows{size_label}")
+            if indexes:
+                index_desc = ", ".join(
+                    f"{idx.get('name')}({', '.join(idx.get('columns', []))})" for idx in indexes
+                )
+                parts.append(f"| 인덱스: {index_desc}")
+
+            # 선택도가 높은(고유값이 많은) 컬럼 상위 3개
+            selective = []
+            for col in table.get("columns", []):
+                distinct = (col.get("stats") or {}).get("distinct_estimate")
+                if distinct and estimated_rows:
+                    selective.append((distinct / estimated_rows, col["column_name"], distinct))
+            selective.sort(reverse=True)
+            if selective:
+                parts.append("| 선택도 높은 컬럼: " + ", ".join(
+                    f"{name}(distinct≈{distinct:,})" for _, name, distinct in selective[:3]
+                ))
+
+            lines.append(" ".join(parts))
+
+        if not lines:
+            return ""
+
+        lines.append(
+            f"대용량 테이블({LARGE_TABLE_ROWS:,} rows 이상)은 반드시 인덱스가 있는 컬럼으로 필터링하고, "
+            "인덱스 컬럼에 함수를 적용하지 마세요."
+        )
+        return "\n".join(lines)
 
     def _parse_llm_response(self, text: str) -> dict:
         try:
-            # Clean up potential markdown code blocks if the model wrapped it
-            text = re.sub(r'^```json\s*', '', text)
-            text = re.sub(r'^```\s*', '', text)
-            text = re.sub(r'\s*```$', '', text)
-            
-            result = json.loads(text)
+            try:
+                # 구조화 출력이므로 대부분 바로 파싱됨
+                result = orjson.loads(text)
+            except orjson.JSONDecodeError:
+                # Clean up potential markdown code blocks if the model wrapped it
+                text = re.sub(r'^```json\s*', '', text)
+                text = re.sub(r'^```\s*', '', text)
+                text = re.sub(r'\s*```$', '', text)
+                result = orjson.loads(text)
             
             # Safety check
             if result.get("sql"):
@@ -201,7 +627,7 @@ class SQLGenerator:
 
 ## Database Info:
 ```json
-{json.dumps(database_info, ensure_ascii=False, indent=2)}
+{orjson.dumps(database_info, option=orjson.OPT_INDENT_2).decode()}
 ```
 
 ## 규칙
@@ -218,17 +644,19 @@ class SQLGenerator:
                 if model_name in ["openai", "gpt-5"]:
                     real_model = "gpt-5-nano-2025-08-07"
                 
-                completion = self.openai_client.chat.completions.create(
-                    model=real_model,
-                    messages=[
-                        {"role": "system", "content": "You are a SQL expert helper."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    response_format={"type": "json_object"} if "JSON" in prompt.upper() else None
-                )
+                with admission.slot(), span("provider"):
+                    completion = self.openai_client.chat.completions.create(
+                        model=real_model,
+                        messages=[
+                            {"role": "system", "content": "You are a SQL expert helper."},
+                            {"role": "user", "content": prompt}
+                        ],
+                        response_format={"type": "json_object"} if "JSON" in prompt.upper() else None
+                    )
                 text = completion.choices[0].message.content
             elif self.gemini_model:
-                response = self.gemini_model.generate_content(prompt)
+                with admission.slot(), span("provider"):
+                    response = self.gemini_model.generate_content(prompt)
                 text = response.text
             else:
                 return ["API 키가 설정되지 않았습니다."]
@@ -242,6 +670,8 @@ class SQLGenerator:
                 lines = [line.strip().lstrip('- ').strip() for line in text.split('\n') if line.strip()]
                 return lines[:10]
                 
+        except AdmissionRejected:
+            raise
         except Exception as e:
             print(f"Error generating samples: {e}")
             return ["샘플 쿼리 생성 실패"]
@@ -0,0 +1,198 @@
+"""
+SQL Validator
+생성된 SQL을 AST로 파싱하여 메타데이터 카탈로그 기준으로 테이블/컬럼 참조를 오프라인 검증
+"""
+
+from typing import Optional, List, Set
+
+import sqlglot
+from sqlglot import exp
+from sqlglot.errors import ParseError
+from sqlglot.optimizer.scope import Scope, traverse_scope
+
+from schema_catalog import SchemaCatalog, get_catalog
+from profiling import span
+
+
+DIALECTS = {
+    "postgresql": "postgres",
+    "mysql": "mysql",
+}
+
+
+class SQLValidator:
+    """DB 왕복 없이 존재하지 않는 테이블/컬럼 참조를 찾아내는 검증기"""
+
+    def validate(self, sql: str, database_info: dict) -> List[str]:
+        """검증 오류 메시지 목록 반환 (빈 목록이면 통과)"""
+        with span("validate"):
+            return self._validate(sql, database_info)
+
+    def _validate(self, sql: str, database_info: dict) -> List[str]:
+        catalog = get_catalog(database_info)
+        if not len(catalog):
+            return []
+
+        dialect = DIALECTS.get((database_info.get("db_type") or "").lower())
+        try:
+            statements = [s for s in sqlglot.parse(sql, read=dialect) if s is not None]
+        except ParseError as e:
+            return [f"SQL 구문 분석 실패: {str(e).splitlines()[0]}"]
+
+        # ETL의 INSERT/CREATE 대상 테이블은 새로 만들거나 카탈로그 밖에 있을 수 있으므로 존재 검사 제외
+        targets = self._write_targets(statements)
+
+        errors: List[str] = []
+        for statement in statements:
+            self._check_tables(statement, catalog, errors, targets)
+            for scope in traverse_scope(statement):
+                self._check_columns(scope, catalog, errors)
+
+        # 같은 오류는 한 번만
+        return list(dict.fromkeys(errors))
+
+    def join_hints(self, sql: str, database_info: dict) -> List[str]:
+        """SQL에 등장한 테이블 쌍의 FK 조인 조건 (재작성 프롬프트 힌트용)"""
+        catalog = get_catalog(database_info)
+        dialect = DIALECTS.get((database_info.get("db_type") or "").lower())
+        try:
+            tables = sorted({
+                key
+                for statement in sqlglot.parse(sql, read=dialect) if statement is not None
+                for t in statement.find_all(exp.Table)
+                if (key := self._resolve_table(t, catalog)) is not None
+            })
+        except ParseError:
+            return []
+
+        hints = []
+        for i, table_a in enumerate(tables):
+            for table_b in tables[i + 1:]:
+                hints.extend(catalog.join_conditions(table_a, table_b))
+        return hints
+
+    def _write_targets(self, statements: List[exp.Expression]) -> Set[str]:
+        targets = set()
+        for statement in statements:
+            for node in statement.find_all(exp.Insert, exp.Create):
+                target = node.this
+                if isinstance(target, exp.Schema):
+                    # INSERT INTO t (a, b) / CREATE TABLE t (...)
+                    target = target.this
+                if isinstance(target, exp.Table):
+                    targets.add(_qualified_name(target))
+        return targets
+
+    def _resolve_table(self, table: exp.Table, catalog: SchemaCatalog) -> Optional[str]:
+        """카탈로그의 테이블 키 (기본 스키마 밖 테이블은 "schema.table"로 등록됨). 없으면 None"""
+        qualified = _qualified_name(table)
+        if catalog.has_table(qualified):
+            return qualified
+        # public.orders처럼 기본 스키마를 명시한 경우
+        if table.db and catalog.has_table(table.name):
+            return table.name.lower()
+        return None
+
+    def _check_tables(self, statement: exp.Expression, catalog: SchemaCatalog, errors: List[str], targets: Set[str]):
+        cte_names = {cte.alias_or_name.lower() for cte in statement.find_all(exp.CTE)}
+        for table in statement.find_all(exp.Table):
+            if not isinstance(table.this, exp.Identifier):
+                # generate_series(...) 같은 테이블 함수
+                continue
+            name = _qualified_name(table)
+            if (not table.db and name in cte_names) or name in targets or self._resolve_table(table, catalog):
+                continue
+            hint = catalog.similar_names(name, catalog.tables)
+            label = f"{table.db}.{table.name}" if table.db else table.name
+            errors.append(f"존재하지 않는 테이블: {label}" + (f" (유사: {', '.join(hint)})" if hint else ""))
+
+    def _check_columns(self, scope: Scope, catalog: SchemaCatalog, errors: List[str]):
+        # ORDER BY/HAVING에서 참조 가능한 SELECT 별칭
+        output_names = {
+            select.alias.lower()
+            for select in getattr(scope.expression, "selects", [])
+            if isinstance(select, exp.Alias)
+        }
+
+        for column in scope.columns:
+            if isinstance(column.this, exp.Star):
+                continue
+            if isinstance(scope.expression, exp.Select) and column.find_ancestor(exp.Select) is not scope.expression:
+                # IN (서브쿼리) 컬럼은 해당 서브쿼리 스코프에서 검사
+                continue
+            name = column.name.lower()
+
+            if column.table:
+                source = self._find_source(scope, column.table)
+                if source is None:
+                    errors.append(f"정의되지 않은 테이블 별칭: {column.table} ({column.sql()})")
+                    continue
+                available = self._source_columns(source, catalog)
+                if available is not None and name not in available:
+                    errors.append(self._missing_column(column.sql(), self._source_label(source, column.table), available, catalog))
+                continue
+
+            # 별칭 없는 컬럼: 현재 스코프의 소스 중 하나에 있어야 함 (SELECT 별칭 참조 허용)
+            if name in output_names:
+                continue
+            sources = list(scope.sources.values())
+            known = [self._source_columns(s, catalog) for s in sources]
+            if not sources or any(cols is None for cols in known):
+                continue
+            if any(name in cols for cols in known):
+                continue
+            if self._found_in_outer_scope(scope, name, catalog):
+                continue
+            merged: Set[str] = set().union(*known)
+            labels = ", ".join(self._source_label(s, alias) for alias, s in scope.sources.items())
+            errors.append(self._missing_column(column.name, labels, merged, catalog))
+
+    def _find_source(self, scope: Optional[Scope], qualifier: str):
+        """상관 서브쿼리를 위해 바깥 스코프까지 별칭 탐색"""
+        qualifier = qualifier.lower()
+        while scope is not None:
+            for alias, source in scope.sources.items():
+                if alias.lower() == qualifier:
+                    return source
+            scope = scope.parent
+        return None
+
+    def _found_in_outer_scope(self, scope: Scope, name: str, catalog: SchemaCatalog) -> bool:
+        outer = scope.parent
+        while outer is not None:
+            for source in outer.sources.values():
+                cols = self._source_columns(source, catalog)
+                if cols is None or name in cols:
+                    return True
+            outer = outer.parent
+        return False
+
+    def _source_columns(self, source, catalog: SchemaCatalog) -> Optional[Set[str]]:
+        """소스가 제공하는 컬럼 집합 (알 수 없으면 None)"""
+        if isinstance(source, exp.Table):
+            key = self._resolve_table(source, catalog)
+            return catalog.columns(key) if key else None
+        if isinstance(source, Scope):
+            expression = source.expression
+            selects = getattr(expression, "selects", None)
+            if not selects or any(isinstance(s, exp.Star) or (isinstance(s, exp.Column) and isinstance(s.this, exp.Star)) for s in selects):
+                return None
+            return {name.lower() for name in expression.named_selects}
+        return None
+
+    def _source_label(self, source, alias: str) -> str:
+        if isinstance(source, exp.Table) and source.name.lower() != alias.lower():
+            return f"{source.name}({alias})"
+        return alias
+
+    def _missing_column(self, column_sql: str, label: str, available: Set[str], catalog: SchemaCatalog) -> str:
+        hint = catalog.similar_names(column_sql.split(".")[-1], available)
+        return f"존재하지 않는 컬럼: {column_sql} [{label}]" + (f" (유사: {', '.join(hint)})" if hint else "")
+
+
+def _qualified_name(table: exp.Table) -> str:
+    return f"{table.db}.{table.name}".lower() if table.db else table.name.lower()
+
+
+# 싱글톤 인스턴스
+sql_validator = SQLValidator()
@@ -21,6 +21,9 @@ const elements = {
     
     // Query
     includeEtlCheckbox: document.getElementById('includeEtl'),
+    checkPlanCheckbox: document.getElementById('checkPlan'),
+    refineSessionCheckbox: document.getElementById('refineSession'),
+    approximatePreviewCheckbox: document.getElementById('approximatePreview'),
     queryInput: document.getElementById('queryInput'),
     generateBtn: document.getElementById('generateBtn'),
     llmSelect: document.getElementById('llmSelect'),
@@ -67,8 +70,9 @@ let currentDbType = 'postgresql';
 
 let currentSource = 'realdb';
 let isConnected = false;
-let extractedMetadata = null;
+let tableListing = null;  // 연결된 DB의 테이블 목록 (컬럼 상세는 서버가 요청별로 로딩)
 let currentResult = null;
+let lastRequestText = '';  // 세션 만료 시 후속 요청과 합쳐 새로 생성
 
 // Saved Connections Configuration
 const savedConnections = {
@@ -149,12 +153,12 @@ function setupEventListeners() {
     // Refresh Samples Button
     if (elements.refreshSamplesBtn) {
         elements.refreshSamplesBtn.addEventListener('click', () => {
-            if (extractedMetadata) {
+            if (tableListing) {
                 const icon = elements.refreshSamplesBtn.querySelector('svg');
                 icon.classList.add('rotating-icon');
                 elements.refreshSamplesBtn.disabled = true;
                 
-                generateSamples(extractedMetadata).finally(() => {
+                generateSamples().finally(() => {
                     icon.classList.remove('rotating-icon');
                     elements.refreshSamplesBtn.disabled = false;
                 });
@@ -186,8 +190,8 @@ function setupEventListeners() {
     // Metadata Modal Events
     if (elements.viewMetadataBtn) {
         elements.viewMetadataBtn.addEventListener('click', () => {
-            if (extractedMetadata) {
-                elements.metadataJsonViewer.textContent = JSON.stringify(extractedMetadata, null, 2);
+            if (tableListing) {
+                elements.metadataJsonViewer.textContent = JSON.stringify(tableListing, null, 2);
                 elements.metadataModal.classList.remove('hidden');
             } else {
                 alert('추출된 메타데이터가 없습니다. 먼저 Extract Schema를 실행해주세요.');
@@ -324,7 +328,7 @@ async function disconnectDatabase() {
     }
     
     isConnected = false;
-    extractedMetadata = null;
+    tableListing = null;
     updateConnectionStatus('disconnected', '연결 안됨');
     
     elements.connectBtn.classList.remove('hidden');
@@ -343,20 +347,20 @@ async function extractMetadata() {
     elements.extractMetadataBtn.disabled = true;
     
     try {
-        const response = await fetch('/api/db/metadata');
+        // 전체 스키마를 상세 조회하지 않고 테이블 목록만 가져옴 (생성 요청마다 서버가 관련 테이블만 로딩)
+        const response = await fetch('/api/db/tables');
         
         if (!response.ok) {
             const error = await response.json();
-            throw new Error(error.detail || '메타데이터 추출 실패');
+            throw new Error(error.detail || '테이블 목록 조회 실패');
         }
         
-        const result = await response.json();
-        extractedMetadata = result.metadata;
+        tableListing = await response.json();
         
-        alert(`✓ ${result.table_count}개의 테이블 메타데이터를 추출했습니다.\n메타데이터를 기반으로 추천 쿼리를 자동 생성합니다.`);
+        alert(`✓ ${tableListing.table_count}개의 테이블을 확인했습니다.\n스키마를 기반으로 추천 쿼리를 자동 생성합니다.`);
         
-        // Generate Samples automatically after metadata extraction
-        await generateSamples(extractedMetadata);
+        // Generate Samples automatically after listing tables (server uses live metadata)
+        await generateSamples();
         
     } catch (error) {
         console.error('Metadata extraction error:', error);
@@ -420,21 +424,37 @@ async function generateSQL() {
     showLoading();
     
     try {
+        let requestText = query;
+        
+        // 이전 결과 수정: 서버 세션(LLM 결과만 생성)이 있으면 변경 요청만 전송, 없으면 이전 요청과 합쳐 새로 생성
+        if (elements.refineSessionCheckbox.checked && currentResult) {
+            const refined = currentResult.session_id ? await refineSQL(query) : null;
+            if (refined) {
+                currentResult = refined;
+                lastRequestText = `${lastRequestText}\n${query}`;
+                renderResult(refined);
+                updateRefineOption();
+                return;
+            }
+            requestText = `${lastRequestText}\n${query}`;
+        }
+        
         const selectedModel = elements.llmSelect ? elements.llmSelect.value : 'gpt-5-mini-2025-08-07';
         const provider = selectedModel.startsWith('gpt') ? 'openai' : 'google';
 
         const requestBody = {
-            request: query,
+            request: requestText,
             db_type: currentDbType,
             include_etl: elements.includeEtlCheckbox.checked,
+            check_plan: elements.checkPlanCheckbox.checked && isConnected,
             provider: provider,
             model_name: selectedModel
         };
         
         // Use appropriate metadata source
-        if (currentSource === 'realdb' && extractedMetadata) {
-            requestBody.database_info = extractedMetadata;
-        } else if (elements.customMetadataCheckbox.checked && elements.metadataEditor.value.trim()) {
+        // 연결된 Live DB는 database_info를 보내지 않음 (서버가 요청과 관련된 테이블만 골라 구성)
+        const useLiveDb = currentSource === 'realdb' && isConnected;
+        if (!useLiveDb && elements.customMetadataCheckbox.checked && elements.metadataEditor.value.trim()) {
             try {
                 requestBody.database_info = JSON.parse(elements.metadataEditor.value);
             } catch (e) {
@@ -457,7 +477,9 @@ async function generateSQL() {
         
         const result = await response.json();
         currentResult = result;
+        lastRequestText = requestText;
         renderResult(result);
+        updateRefineOption();
         
     } catch (error) {
         console.error('Error generating SQL:', error);
@@ -467,6 +489,36 @@ async function generateSQL() {
     }
 }
 
+async function refineSQL(query) {
+    const response = await fetch('/api/refine-sql', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({
+            session_id: currentResult.session_id,
+            request: query,
+            check_plan: elements.checkPlanCheckbox.checked && isConnected
+        })
+    });
+    
+    if (response.status === 404) {
+        // 세션 만료: 이전 요청과 합쳐 새로 생성
+        return null;
+    }
+    if (!response.ok) {
+        const error = await response.json();
+        throw new Error(error.detail || 'SQL 수정 실패');
+    }
+    return await response.json();
+}
+
+function updateRefineOption() {
+    const hasResult = Boolean(currentResult && currentResult.sql && !currentResult.is_blocked);
+    elements.refineSessionCheckbox.disabled = !hasResult;
+    if (!hasResult) {
+        elements.refineSessionCheckbox.checked = false;
+    }
+}
+
 // ===== Query Execution =====
 
 async function executeQuery() {
@@ -492,7 +544,11 @@ async function executeQuery() {
         const response = await fetch('/api/db/execute', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ sql: sqlToExecute, limit: 50 })
+            body: JSON.stringify({
+                sql: sqlToExecute,
+                limit: 50,
+                approximate: elements.approximatePreviewCheckbox.checked
+            })
         });
         
         if (!response.ok) {
@@ -530,7 +586,14 @@ function renderQueryResult(result) {
     let html = '';
     
     if (result.columns && result.data) {
-        html += `<div style="margin-bottom: 1rem; font-weight: 600;">${result.row_count} rows returned</div>`;
+        html += `<div style="margin-bottom: 1rem; font-weight: 600;">${result.row_count} rows returned`;
+        if (result.approximate) {
+            html += ` <span class="badge" title="COUNT/SUM scaled ×${result.scale_factor}: ${escapeHtml((result.scaled_columns || []).join(', '))}">approximate (sample ${result.sample_percent}%)</span>`;
+        }
+        html += '</div>';
+        (result.notes || []).forEach(note => {
+            html += `<div style="margin-bottom: 0.5rem; opacity: 0.7; font-size: 0.85rem;">${escapeHtml(note)}</div>`;
+        });
         html += '<div class="result-table-container"><table class="result-table">';
         html += '<thead><tr>';
         result.columns.forEach(col => {
@@ -0,0 +1,223 @@
+"""
+Static Asset Service
+정적 파일 및 메인 페이지 메모리 캐시 (사전 압축, ETag, 버전 기반 장기 캐싱)
+"""
+
+import os
+import re
+import gzip
+import hashlib
+import mimetypes
+from typing import Optional, Dict
+
+from fastapi import Request
+from fastapi.responses import Response
+
+try:
+    import brotli
+except ImportError:  # brotli 미설치 시 gzip만 제공
+    brotli = None
+
+
+# 버전(?v=)이 붙은 요청은 내용이 바뀌면 URL이 바뀌므로 1년간 캐싱
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# 이보다 작은 파일은 압축 이득이 없어 원본만 제공
+MIN_COMPRESS_SIZE = 512
+
+STATIC_URL_PATTERN = re.compile(r'(["\'])/static/([^"\'?#]+)\1')
+
+
+class StaticAsset:
+    """사전 압축된 단일 정적 파일"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.mtime = os.stat(path).st_mtime
+        with open(path, "rb") as f:
+            self.body = f.read()
+
+        self.media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        if self.media_type.startswith("text/") or self.media_type in ("application/javascript", "application/json"):
+            self.media_type += "; charset=utf-8"
+
+        self.version = hashlib.sha256(self.body).hexdigest()[:16]
+        self.etag = f'"{self.version}"'
+
+        self.encoded = _precompress(self.body, self.version)
+
+    def is_stale(self) -> bool:
+        try:
+            return os.stat(self.path).st_mtime != self.mtime
+        except OSError:
+            return True
+
+    def all_etags(self) -> set[str]:
+        return {self.etag} | {etag for _, etag in self.encoded.values()}
+
+
+class StaticAssetCache:
+    """정적 디렉토리 전체를 메모리에 보관하고 변경 시에만 다시 읽는 캐시"""
+
+    def __init__(self, directory: str):
+        self.directory = os.path.realpath(directory)
+        self.assets: Dict[str, StaticAsset] = {}
+
+        if os.path.isdir(self.directory):
+            for root, _, files in os.walk(self.directory):
+                for name in files:
+                    full_path = os.path.join(root, name)
+                    rel_path = os.path.relpath(full_path, self.directory).replace(os.sep, "/")
+                    self.assets[rel_path] = StaticAsset(full_path)
+
+    def get(self, rel_path: str) -> Optional[StaticAsset]:
+        """상대 경로로 파일 조회 (디렉토리 밖 경로는 거부)"""
+        asset = self.assets.get(rel_path)
+        if asset is not None and not asset.is_stale():
+            return asset
+
+        full_path = os.path.realpath(os.path.join(self.directory, rel_path))
+        if not full_path.startswith(self.directory + os.sep) or not os.path.isfile(full_path):
+            self.assets.pop(rel_path, None)
+            return None
+
+        asset = StaticAsset(full_path)
+        self.assets[rel_path] = asset
+        return asset
+
+    def versioned_url(self, rel_path: str) -> str:
+        """내용 해시가 붙은 URL 반환 (index.html 링크 치환용)"""
+        asset = self.get(rel_path)
+        if asset is None:
+            return f"/static/{rel_path}"
+        return f"/static/{rel_path}?v={asset.version}"
+
+    def response(self, request: Request, rel_path: str) -> Response:
+        asset = self.get(rel_path)
+        if asset is None:
+            return Response(status_code=404)
+
+        versioned = request.query_params.get("v") == asset.version
+        headers = {
+            "Cache-Control": IMMUTABLE_CACHE_CONTROL if versioned else REVALIDATE_CACHE_CONTROL,
+            "Vary": "Accept-Encoding"
+        }
+
+        body, etag = asset.body, asset.etag
+        encoding = _choose_encoding(request, asset.encoded)
+        if encoding:
+            body, etag = asset.encoded[encoding]
+
+        headers["ETag"] = etag
+        if _etag_matches(request, asset.all_etags()):
+            return Response(status_code=304, headers=headers)
+
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        if request.method == "HEAD":
+            headers["Content-Length"] = str(len(body))
+            return Response(status_code=200, headers=headers, media_type=asset.media_type)
+        return Response(content=body, headers=headers, media_type=asset.media_type)
+
+
+class CachedPage:
+    """HTML 페이지 메모리 캐시 (페이지나 링크된 정적 파일 변경 시에만 다시 읽음, 정적 링크에 버전 부여)"""
+
+    def __init__(self, path: str, assets: StaticAssetCache):
+        self.path = path
+        self.assets = assets
+        self.mtime = None
+        self.body: Optional[bytes] = None
+        self.etag: Optional[str] = None
+        self.encoded: Dict[str, tuple[bytes, str]] = {}
+        # 렌더링 당시 링크된 정적 파일의 버전 (상대 경로 → 버전, 없는 파일은 None)
+        self.linked_versions: Dict[str, Optional[str]] = {}
+
+    def _asset_version(self, rel_path: str) -> Optional[str]:
+        asset = self.assets.get(rel_path)
+        return asset.version if asset is not None else None
+
+    def _is_stale(self, mtime: float) -> bool:
+        if self.body is None or mtime != self.mtime:
+            return True
+        # 정적 파일만 바뀌어도 ?v= 해시가 바뀌어야 immutable 캐시가 갱신됨
+        return any(self._asset_version(rel_path) != version for rel_path, version in self.linked_versions.items())
+
+    def _load(self):
+        mtime = os.stat(self.path).st_mtime
+        if not self._is_stale(mtime):
+            return
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            html = f.read()
+        linked_versions = {}
+
+        def replace(m):
+            rel_path = m.group(2)
+            linked_versions[rel_path] = self._asset_version(rel_path)
+            return f"{m.group(1)}{self.assets.versioned_url(rel_path)}{m.group(1)}"
+
+        html = STATIC_URL_PATTERN.sub(replace, html)
+        self.body = html.encode("utf-8")
+        version = hashlib.sha256(self.body).hexdigest()[:16]
+        self.etag = f'"{version}"'
+        self.encoded = _precompress(self.body, version)
+        self.mtime = mtime
+        self.linked_versions = linked_versions
+
+    def warm(self):
+        """미리 읽어 두기 (fork 전 마스터에서 호출)"""
+        if os.path.exists(self.path):
+            self._load()
+
+    def response(self, request: Request) -> Optional[Response]:
+        if not os.path.exists(self.path):
+            return None
+        self._load()
+
+        # 사전 압축본에 Content-Encoding이 붙어 GZipMiddleware가 다시 압축하지 않음 (인코딩별 ETag 유지)
+        body, etag = self.body, self.etag
+        encoding = _choose_encoding(request, self.encoded)
+        if encoding:
+            body, etag = self.encoded[encoding]
+
+        headers = {"ETag": etag, "Cache-Control": REVALIDATE_CACHE_CONTROL, "Vary": "Accept-Encoding"}
+        if _etag_matches(request, {self.etag} | {tag for _, tag in self.encoded.values()}):
+            return Response(status_code=304, headers=headers)
+
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return Response(content=body, headers=headers, media_type="text/html; charset=utf-8")
+
+
+def _precompress(body: bytes, version: str) -> Dict[str, tuple[bytes, str]]:
+    """인코딩별 압축본과 표현(representation)마다 서로 다른 강한 ETag (압축 이득이 없으면 생략)"""
+    encoded: Dict[str, tuple[bytes, str]] = {}
+    if len(body) >= MIN_COMPRESS_SIZE:
+        gz_body = gzip.compress(body, compresslevel=9, mtime=0)
+        if len(gz_body) < len(body):
+            encoded["gzip"] = (gz_body, f'"{version}-gz"')
+        if brotli is not None:
+            br_body = brotli.compress(body, quality=11)
+            if len(br_body) < len(body):
+                encoded["br"] = (br_body, f'"{version}-br"')
+    return encoded
+
+
+def _etag_matches(request: Request, etags: set[str]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip() in etags for tag in if_none_match.split(","))
+
+
+def _choose_encoding(request: Request, encoded: Dict[str, tuple[bytes, str]]) -> Optional[str]:
+    accept_encoding = request.headers.get("accept-encoding", "")
+    accepted = {part.split(";")[0].strip().lower() for part in accept_encoding.split(",")}
+    for encoding in ("br", "gzip"):
+        if encoding in encoded and encoding in accepted:
+            return encoding
+    return None
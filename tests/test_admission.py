@@ -0,0 +1,48 @@
+from types import SimpleNamespace
+
+import pytest
+
+from admission import AdmissionController, AdmissionRejected, client_id
+
+
+def make_request(forwarded=None, host="10.0.0.1"):
+    headers = {"x-forwarded-for": forwarded} if forwarded else {}
+    return SimpleNamespace(headers=headers, client=SimpleNamespace(host=host))
+
+
+def test_client_id_uses_hop_appended_by_proxy():
+    # 클라이언트가 보낸 값(1.1.1.1)이 아니라 프록시가 덧붙인 마지막 주소
+    assert client_id(make_request("1.1.1.1, 203.0.113.7")) == "203.0.113.7"
+
+
+def test_client_id_with_two_trusted_proxies():
+    request = make_request("1.1.1.1, 203.0.113.7, 10.0.0.2")
+    assert client_id(request, trusted_proxies=2) == "203.0.113.7"
+
+
+def test_client_id_falls_back_to_connection_address():
+    assert client_id(make_request()) == "10.0.0.1"
+    assert client_id(make_request("203.0.113.7"), trusted_proxies=0) == "10.0.0.1"
+    assert client_id(make_request("203.0.113.7"), trusted_proxies=2) == "10.0.0.1"
+
+
+def test_spoofed_forwarded_for_does_not_bypass_rate_limit(tmp_path):
+    controller = AdmissionController(rate_per_minute=1, burst=2, rate_limit_path=str(tmp_path / "rate.sqlite3"))
+    for spoofed in ("1.1.1.1", "2.2.2.2"):
+        controller.check_rate(client_id(make_request(f"{spoofed}, 203.0.113.7")))
+    with pytest.raises(AdmissionRejected) as exc_info:
+        controller.check_rate(client_id(make_request("3.3.3.3, 203.0.113.7")))
+    assert exc_info.value.status_code == 429
+
+
+def test_rate_limit_shared_across_workers(tmp_path):
+    # 같은 파일을 쓰는 두 워커가 한 클라이언트의 허용량을 나눠 씀
+    path = str(tmp_path / "rate.sqlite3")
+    workers = [AdmissionController(rate_per_minute=1, burst=2, rate_limit_path=path) for _ in range(2)]
+    workers[0].check_rate("203.0.113.7")
+    workers[1].check_rate("203.0.113.7")
+    with pytest.raises(AdmissionRejected):
+        workers[0].check_rate("203.0.113.7")
+    with pytest.raises(AdmissionRejected):
+        workers[1].check_rate("203.0.113.7")
+    workers[1].check_rate("198.51.100.1")
@@ -0,0 +1,96 @@
+import pytest
+
+from approx_preview import approx_preview
+
+
+ROWS = {"orders": 5_000_000, "users": 20_000, "sales.order_items": 50_000_000}
+
+JOIN_QUERY = (
+    "SELECT u.username, COUNT(*) AS n, SUM(o.total_amount) AS total, AVG(o.total_amount) AS average, "
+    "COUNT(DISTINCT o.user_id) AS buyers FROM orders o JOIN users u ON u.id = o.user_id GROUP BY u.username"
+)
+
+
+def test_postgres_samples_largest_table_only():
+    result = approx_preview.rewrite(JOIN_QUERY, "postgresql", 1, ROWS)
+    assert result["approximate"]
+    assert "FROM orders AS o TABLESAMPLE SYSTEM (1) JOIN users AS u" in result["sql"]
+    # COUNT/SUM만 환산 (AVG, COUNT DISTINCT 제외)
+    assert result["scaled_positions"] == [1, 2]
+
+
+def test_mysql_uses_random_filter_subquery():
+    result = approx_preview.rewrite(JOIN_QUERY, "mysql", 2, ROWS)
+    assert "FROM (SELECT * FROM orders WHERE RAND() < 0.02) AS o JOIN users AS u" in result["sql"]
+
+
+def test_schema_qualified_table():
+    result = approx_preview.rewrite("SELECT COUNT(*) FROM sales.order_items", "postgresql", 1, ROWS)
+    assert result["sql"] == "SELECT COUNT(*) FROM sales.order_items TABLESAMPLE SYSTEM (1)"
+
+
+def test_only_outermost_reference_sampled():
+    sql = "SELECT COUNT(*) FROM orders o WHERE o.user_id IN (SELECT user_id FROM orders WHERE status = 'cancelled')"
+    result = approx_preview.rewrite(sql, "postgresql", 1, ROWS)
+    assert result["sql"].count("TABLESAMPLE") == 1
+    assert result["sql"].startswith("SELECT COUNT(*) FROM orders AS o TABLESAMPLE SYSTEM (1) WHERE")
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT COUNT(*) FROM orders a JOIN orders b ON a.user_id = b.user_id",
+    "SELECT COUNT(*) FROM (SELECT id FROM orders) x WHERE x.id IN (SELECT id FROM orders)",
+])
+def test_ambiguous_references_refused(sql):
+    result = approx_preview.rewrite(sql, "postgresql", 1, ROWS)
+    assert not result["success"]
+
+
+@pytest.mark.parametrize("rows", [{"orders": 5_000}, {}, {"orders": None}])
+def test_small_or_unknown_tables_run_exactly(rows):
+    sql = "SELECT COUNT(*) FROM orders"
+    result = approx_preview.rewrite(sql, "postgresql", 1, rows)
+    assert result["success"] and not result["approximate"]
+    assert result["sql"] == sql
+
+
+def test_non_select_and_unsupported_db_rejected():
+    assert not approx_preview.rewrite("DELETE FROM orders", "postgresql", 1, ROWS)["success"]
+    assert not approx_preview.rewrite("SELECT 1", "sqlite", 1, ROWS)["success"]
+    assert not approx_preview.rewrite("SELECT 1", "postgresql", 0, ROWS)["success"]
+
+
+def test_scale_counts_and_sums():
+    rewrite = approx_preview.rewrite(JOIN_QUERY, "postgresql", 1, ROWS)
+    result = {
+        "columns": ["username", "n", "total", "average", "buyers"],
+        "data": [{"username": "a", "n": 12, "total": "10.50", "average": 3.5, "buyers": 4}],
+    }
+    approx_preview.scale(result, rewrite, 1)
+    assert result["data"][0] == {"username": "a", "n": 1200, "total": "1050.000", "average": 3.5, "buyers": 4}
+    assert result["scaled_columns"] == ["n", "total"]
+    assert result["scale_factor"] == 100
+
+
+def test_wrapped_aggregates_scaled_and_others_noted():
+    sql = (
+        "SELECT status, ROUND(SUM(total_amount), 2) AS total, COALESCE(COUNT(*), 0) AS n, "
+        "CAST(SUM(total_amount) AS BIGINT) AS whole, SUM(total_amount) * 100 AS cents FROM orders GROUP BY status"
+    )
+    result = approx_preview.rewrite(sql, "postgresql", 1, ROWS)
+    assert result["scaled_positions"] == [1, 2, 3]
+    assert "cents" in result["notes"][-1]
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT user_id, COUNT(*) FROM orders GROUP BY user_id HAVING COUNT(*) > 10",
+    "SELECT user_id FROM orders GROUP BY user_id HAVING SUM(total_amount) BETWEEN 100 AND 1000",
+    "SELECT * FROM (SELECT user_id, COUNT(*) AS c FROM orders GROUP BY user_id) t WHERE t.c >= 5",
+])
+def test_aggregate_compared_to_literal_refused(sql):
+    result = approx_preview.rewrite(sql, "postgresql", 1, ROWS)
+    assert not result["success"]
+
+
+def test_full_table_subquery_aggregate_allowed():
+    sql = "SELECT COUNT(*) FROM orders o WHERE o.total_amount > (SELECT AVG(total_amount) FROM orders)"
+    assert approx_preview.rewrite(sql, "postgresql", 1, ROWS)["success"]
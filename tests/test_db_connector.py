@@ -0,0 +1,72 @@
+import orjson
+from sqlalchemy import create_engine, text
+
+from db_connector import DatabaseConnector
+from sample_metadata import SAMPLE_POSTGRES_ECOMMERCE
+from schema_catalog import SchemaCatalog
+
+
+def make_connector(db_type="postgresql"):
+    connector = DatabaseConnector()
+    connector.engine = create_engine("sqlite://")
+    connector.connection_info = {"db_type": db_type}
+    with connector.engine.begin() as conn:
+        conn.execute(text("CREATE TABLE orders (id INTEGER PRIMARY KEY, total INTEGER)"))
+    return connector
+
+
+def table_exists(connector, name):
+    with connector.engine.connect() as conn:
+        return conn.execute(text("SELECT name FROM sqlite_master WHERE name = :name"), {"name": name}).first() is not None
+
+
+def test_explain_rejects_multiple_statements():
+    connector = make_connector()
+    result = connector.explain_query("SELECT 1; DROP TABLE orders")
+    assert not result["success"]
+    assert table_exists(connector, "orders")
+
+
+def test_explain_rejects_non_select():
+    connector = make_connector()
+    result = connector.explain_query("DELETE FROM orders")
+    assert not result["success"]
+    assert "SELECT" in result["error"]
+
+
+def test_explain_rejects_unparseable_sql():
+    result = make_connector().explain_query("SELECT FROM WHERE (")
+    assert not result["success"]
+
+
+def test_metadata_payload_encoded_from_catalog():
+    connector = make_connector()
+    assert connector.get_metadata_payload() is None
+    connector.metadata_catalog = SchemaCatalog.from_metadata(SAMPLE_POSTGRES_ECOMMERCE)
+
+    payload = orjson.loads(connector.get_metadata_payload())
+    assert payload["success"]
+    assert payload["table_count"] == len(SAMPLE_POSTGRES_ECOMMERCE["schema_summary"]["tables"])
+    assert payload["metadata"]["schema_summary"]["tables"][0]["table_name"] == "users"
+
+
+def test_approximate_row_counts_prefer_default_schema(monkeypatch):
+    connector = make_connector()
+    listing = {
+        "success": True,
+        "default_schema": "public",
+        "tables": [
+            {"schema": "public", "name": "orders", "estimated_rows": 1_000},
+            {"schema": "archive", "name": "orders", "estimated_rows": 90_000_000},
+        ],
+    }
+    monkeypatch.setattr(connector, "list_tables", lambda: listing)
+    seen = {}
+
+    def rewrite(sql, db_type, percent, table_rows):
+        seen.update(table_rows)
+        return {"success": False, "error": "stop"}
+
+    monkeypatch.setattr("db_connector.approx_preview.rewrite", rewrite)
+    connector.test_query("SELECT COUNT(*) FROM orders", approximate=True)
+    assert seen == {"public.orders": 1_000, "orders": 1_000, "archive.orders": 90_000_000}
@@ -0,0 +1,42 @@
+import os
+import subprocess
+import sys
+
+import profiling
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def profiling_enabled(**env):
+    result = subprocess.run(
+        [sys.executable, "-c", "import profiling; print(profiling.PROFILING_ENABLED)"],
+        cwd=ROOT, env=dict(os.environ, **env), capture_output=True, text=True, check=True
+    )
+    return result.stdout.strip().splitlines()[-1] == "True"
+
+
+def test_profiling_requires_token():
+    assert not profiling_enabled(PROFILING_ENABLED="true", PROFILE_TOKEN="")
+    assert profiling_enabled(PROFILING_ENABLED="true", PROFILE_TOKEN="secret")
+
+
+def test_profile_header_must_match_token(monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILING_ENABLED", True)
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", "secret")
+
+    def requested(value):
+        return profiling._profile_requested({"headers": [(b"x-profile", value)]})
+
+    assert requested(b"secret")
+    assert not requested(b"1")
+    assert not requested(b"")
+    assert profiling.authorized("secret")
+    assert not profiling.authorized(None)
+
+
+def test_nothing_authorized_without_token(monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILING_ENABLED", True)
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", "")
+    assert not profiling.authorized("")
+    assert not profiling._profile_requested({"headers": [(b"x-profile", b"true")]})
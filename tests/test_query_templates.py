@@ -0,0 +1,92 @@
+import pytest
+
+from query_templates import QueryTemplateCache
+from sample_metadata import SAMPLE_POSTGRES_ECOMMERCE
+
+
+def reuse_result(stored_request, sql, new_request, assumptions=(), safety_notes=()):
+    cache = QueryTemplateCache()
+    cache.store(stored_request, SAMPLE_POSTGRES_ECOMMERCE, {
+        "sql": sql, "assumptions": list(assumptions), "safety_notes": list(safety_notes)
+    })
+    return cache.lookup(new_request, SAMPLE_POSTGRES_ECOMMERCE)
+
+
+def reuse(stored_request, sql, new_request):
+    result = reuse_result(stored_request, sql, new_request)
+    return result and result["sql"]
+
+
+def test_number_and_month_slots():
+    sql = reuse(
+        "3월 10만원 이상 주문",
+        "SELECT * FROM orders WHERE total_amount >= 100000 AND order_date >= '2025-03-01' AND order_date < '2025-04-01'",
+        "4월 5만원 이상 주문",
+    )
+    assert sql == "SELECT * FROM orders WHERE total_amount >= 50000 AND order_date >= '2025-04-01' AND order_date < '2025-05-01'"
+
+
+def test_half_open_month_range_across_year_end():
+    sql = reuse(
+        "2025년 3월 주문",
+        "SELECT * FROM orders WHERE order_date >= '2025-03-01' AND order_date < '2025-04-01'",
+        "2024년 12월 주문",
+    )
+    assert sql == "SELECT * FROM orders WHERE order_date >= '2024-12-01' AND order_date < '2025-01-01'"
+
+
+def test_month_end_maps_to_month_end():
+    sql = reuse(
+        "2025년 2월 주문",
+        "SELECT * FROM orders WHERE order_date BETWEEN '2025-02-01' AND '2025-02-28'",
+        "2025년 3월 주문",
+    )
+    assert sql == "SELECT * FROM orders WHERE order_date BETWEEN '2025-03-01' AND '2025-03-31'"
+
+
+def test_year_range():
+    sql = reuse(
+        "2025년 주문",
+        "SELECT * FROM orders WHERE order_date BETWEEN '2025-01-01' AND '2025-12-31'",
+        "2024년 주문",
+    )
+    assert sql == "SELECT * FROM orders WHERE order_date BETWEEN '2024-01-01' AND '2024-12-31'"
+
+
+@pytest.mark.parametrize("sql", [
+    # 기간이 요청한 달과 다름
+    "SELECT * FROM orders WHERE EXTRACT(MONTH FROM order_date) = 3 "
+    "AND order_date >= '2025-02-01' AND order_date < '2026-02-01'",
+    # 월 숫자가 날짜 리터럴 밖에서도 쓰임
+    "SELECT * FROM orders WHERE EXTRACT(MONTH FROM order_date) = 3 "
+    "AND order_date >= '2025-03-01' AND order_date < '2025-04-01'",
+    "SELECT * FROM orders WHERE to_char(order_date, 'YYYY-MM') = '2025-03' "
+    "AND order_date >= '2025-03-01' AND order_date < '2025-04-01'",
+    # 한 달 범위가 아닌 날짜 쌍
+    "SELECT * FROM orders WHERE order_date >= '2025-03-01' AND order_date < '2025-03-15'",
+    # 날짜 리터럴이 두 개가 아님
+    "SELECT * FROM orders WHERE order_date >= '2025-03-01'",
+])
+def test_unrecognized_period_is_not_templated(sql):
+    assert reuse("2025년 3월 주문", sql, "2025년 4월 주문") is None
+
+
+@pytest.mark.parametrize("request_text, sql", [
+    ("100원 초과 주문", "SELECT * FROM orders WHERE total_amount > 100 LIMIT 100"),
+    ("상위 2개 주문", "SELECT id, total_amount FROM orders ORDER BY 2 DESC LIMIT 2"),
+])
+def test_repeated_literal_is_not_templated(request_text, sql):
+    assert reuse(request_text, sql, request_text.replace("100", "50").replace("2", "3")) is None
+
+
+def test_stored_notes_are_not_reused():
+    result = reuse_result(
+        "100원 초과 주문",
+        "SELECT * FROM orders WHERE total_amount > 100",
+        "500원 초과 주문",
+        assumptions=["100원 초과 주문으로 가정"],
+        safety_notes=["예상 비용 1200 → 300"],
+    )
+    assert result["sql"] == "SELECT * FROM orders WHERE total_amount > 500"
+    assert result["assumptions"] == ["리터럴만 다른 이전 요청의 쿼리 템플릿을 재사용했습니다."]
+    assert result["safety_notes"] == []
@@ -0,0 +1,106 @@
+import time
+
+import orjson
+import pytest
+
+import refine_sessions
+import sql_generator as sql_generator_module
+from refine_sessions import SessionStore
+from sample_metadata import SAMPLE_POSTGRES_ECOMMERCE
+from sql_generator import sql_generator
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    return str(tmp_path / "sessions.sqlite3")
+
+
+def make_session(store, request="latest orders"):
+    session = store.create(SAMPLE_POSTGRES_ECOMMERCE, False, "openai", "model")
+    session.add_turn(request, "schema + " + request, '{"sql": "SELECT 1"}', {"sql": "SELECT 1"})
+    assert store.save(session)
+    return session
+
+
+def test_session_visible_to_other_worker(store_path):
+    # 워커마다 별도 SessionStore 인스턴스가 같은 파일을 사용
+    session = make_session(SessionStore(store_path))
+    loaded = SessionStore(store_path).get(session.id)
+    assert loaded is not None
+    assert loaded.requests == ["latest orders"]
+    assert loaded.messages == session.messages
+    assert loaded.database_info == SAMPLE_POSTGRES_ECOMMERCE
+
+
+def test_concurrent_update_is_not_overwritten(store_path):
+    store = SessionStore(store_path)
+    session = make_session(store)
+    first, second = store.get(session.id), store.get(session.id)
+
+    first.add_turn("only last month", "turn", "{}", {"sql": "SELECT 2"})
+    assert store.save(first)
+    second.add_turn("add email", "turn", "{}", {"sql": "SELECT 3"})
+    assert not store.save(second)
+
+    assert store.get(session.id).requests == ["latest orders", "only last month"]
+
+
+def test_expired_and_excess_sessions_removed(store_path):
+    store = SessionStore(store_path, max_sessions=2, ttl_seconds=60)
+    sessions = [make_session(store, f"request {i}") for i in range(3)]
+    assert store.get(sessions[0].id) is None
+    assert store.get(sessions[2].id) is not None
+
+    store.ttl_seconds = 0
+    time.sleep(0.01)
+    assert store.get(sessions[2].id) is None
+
+
+def test_turns_trimmed_but_first_turn_kept(store_path, monkeypatch):
+    monkeypatch.setattr(refine_sessions, "MAX_SESSION_TURNS", 2)
+    session = make_session(SessionStore(store_path))
+    for i in range(5):
+        session.add_turn(f"follow-up {i}", f"turn {i}", "{}", {"sql": "SELECT 1"})
+    assert session.messages[0]["content"] == "schema + latest orders"
+    assert [m["content"] for m in session.messages[2::2]] == ["turn 3", "turn 4"]
+
+
+def test_fast_path_result_creates_no_session(store_path, monkeypatch):
+    monkeypatch.setattr(sql_generator_module, "refine_sessions", SessionStore(store_path))
+    result = sql_generator.generate_sql("latest 5 orders", SAMPLE_POSTGRES_ECOMMERCE)
+    assert result["sql"].endswith("LIMIT 5;")
+    assert result.get("session_id") is None
+
+
+def test_llm_result_creates_session_and_refine_appends_turn(store_path, monkeypatch):
+    store = SessionStore(store_path)
+    monkeypatch.setattr(sql_generator_module, "refine_sessions", store)
+    monkeypatch.setattr(sql_generator, "_openai_client", object())
+    responses = iter([
+        {"intent_summary": "orders", "sql": "SELECT id, total_amount FROM orders", "assumptions": [],
+         "safety_notes": [], "tables_used": ["orders"], "is_blocked": False, "block_reason": None},
+        {"intent_summary": "orders", "sql": "SELECT id, total_amount, status FROM orders", "assumptions": [],
+         "safety_notes": [], "tables_used": ["orders"], "is_blocked": False, "block_reason": None},
+    ])
+    calls = []
+
+    def complete(provider, model_name, system_content, user_content, include_etl, history=None):
+        calls.append((user_content, list(history or [])))
+        return orjson.dumps(next(responses)).decode()
+
+    monkeypatch.setattr(sql_generator, "_complete", complete)
+    monkeypatch.setattr(sql_generator, "_generate_sql_openai",
+                        lambda request, info, etl, model: sql_generator._parse_llm_response(complete("openai", model, "", request, etl)))
+
+    result = sql_generator.generate_sql("주문 금액 목록과 배송지", SAMPLE_POSTGRES_ECOMMERCE)
+    assert result["session_id"]
+
+    # 다른 워커에서 세션을 읽어 후속 요청 처리
+    session = SessionStore(store_path).get(result["session_id"])
+    refined = sql_generator.refine_sql(session, "상태도 추가")
+    assert refined["sql"] == "SELECT id, total_amount, status FROM orders"
+
+    user_content, history = calls[-1]
+    assert "상태도 추가" in user_content and "Database Info" not in user_content
+    assert len(history) == 2
+    assert store.get(result["session_id"]).requests == ["주문 금액 목록과 배송지", "상태도 추가"]
@@ -0,0 +1,70 @@
+import pytest
+
+from rule_engine import rule_engine, RuleBasedGenerator
+from sample_metadata import SAMPLE_POSTGRES_ECOMMERCE, SAMPLE_MYSQL_HR
+from sql_generator import FAST_PATH_MIN_CONFIDENCE
+
+
+def fast_path(request, database_info=SAMPLE_POSTGRES_ECOMMERCE):
+    result = rule_engine.generate(request, database_info)
+    if result is None or result["confidence"] < FAST_PATH_MIN_CONFIDENCE:
+        return None
+    return result
+
+
+@pytest.mark.parametrize("request_text, limit", [
+    ("latest 5 orders", 5),
+    ("5 latest orders", 5),
+    ("최근 주문 5건", 5),
+    ("최근 5건 주문", 5),
+    ("최근 주문 보여줘", 10),
+])
+def test_latest_limit(request_text, limit):
+    result = fast_path(request_text)
+    assert result is not None
+    assert result["sql"].endswith(f"LIMIT {limit};")
+
+
+@pytest.mark.parametrize("request_text", [
+    # 건수 지정이 아닌 숫자 (사용자 ID)
+    "latest 5 orders of user 42",
+    "orders of user 42",
+    # 정렬 기준 지정
+    "latest 3 orders sorted by total amount",
+    "최근 주문 금액순으로 정렬",
+    # 부정 조건
+    "latest orders excluding cancelled",
+    "orders not cancelled count",
+    "취소 제외 주문 건수",
+    # 그룹별 최신, 최신 기준이 아닌 컬럼 언급
+    "latest 5 orders per user",
+    "latest 5 orders by price",
+    "최근 주문 5건 사용자별",
+])
+def test_unsupported_modifiers_skip_fast_path(request_text):
+    assert fast_path(request_text) is None
+
+
+def test_count_by_status():
+    result = fast_path("주문 상태별 건수")
+    assert "GROUP BY status" in result["sql"]
+
+
+def test_value_filter():
+    result = fast_path("cancelled orders count")
+    assert "status = 'cancelled'" in result["sql"]
+
+
+def test_tied_tables_skip_fast_path():
+    # departments와 employees가 같은 강도로 언급됨
+    assert fast_path("department count of employees", SAMPLE_MYSQL_HR) is None
+
+
+def test_index_cache_keeps_recently_used_entry():
+    engine = RuleBasedGenerator(max_cached_indexes=2)
+    listing = {"schema_summary": {"tables": []}}
+    index = engine.get_index(listing)
+    for _ in range(5):
+        # 요청마다 새 메타데이터가 들어와도 매번 쓰이는 목록 인덱스는 유지
+        engine.get_index({"schema_summary": {"tables": []}})
+        assert engine.get_index(listing) is index
@@ -0,0 +1,70 @@
+import pytest
+
+from sample_metadata import SAMPLE_POSTGRES_ECOMMERCE
+from sql_validator import sql_validator
+
+
+def validate(sql, info=SAMPLE_POSTGRES_ECOMMERCE):
+    return sql_validator.validate(sql, info)
+
+
+def test_valid_query_passes():
+    assert validate("SELECT o.id, u.email FROM orders o JOIN users u ON u.id = o.user_id") == []
+
+
+def test_unknown_table_and_column_reported():
+    assert validate("SELECT * FROM orderz")[0].startswith("존재하지 않는 테이블: orderz")
+    assert validate("SELECT o.amount FROM orders o")[0].startswith("존재하지 않는 컬럼: o.amount")
+
+
+@pytest.mark.parametrize("sql", [
+    "INSERT INTO daily_sales (sale_date, total) SELECT order_date, SUM(total_amount) FROM orders GROUP BY order_date",
+    "CREATE TABLE daily_sales (sale_date DATE, total NUMERIC); "
+    "INSERT INTO daily_sales SELECT order_date, total_amount FROM orders",
+    "CREATE TABLE daily_sales AS SELECT order_date, SUM(total_amount) AS total FROM orders GROUP BY order_date",
+])
+def test_etl_write_targets_are_not_reported(sql):
+    assert validate(sql) == []
+
+
+def test_etl_source_tables_still_checked():
+    errors = validate("INSERT INTO daily_sales SELECT order_date FROM orderz")
+    assert errors == ["존재하지 않는 테이블: orderz (유사: orders)"]
+
+
+SCHEMA_QUALIFIED = {
+    "db_type": "PostgreSQL",
+    "schema_summary": {
+        "tables": [
+            {"table_name": "users", "columns": [
+                {"column_name": "id", "data_type": "INTEGER"},
+                {"column_name": "email", "data_type": "VARCHAR(255)"},
+            ]},
+            {"table_name": "sales.orders", "columns": [
+                {"column_name": "id", "data_type": "INTEGER"},
+                {"column_name": "user_id", "data_type": "INTEGER"},
+                {"column_name": "total_amount", "data_type": "NUMERIC"},
+            ]},
+        ],
+        "relationships": ["sales.orders.user_id → users.id"],
+    },
+}
+
+
+def test_schema_qualified_table_resolves():
+    sql = "SELECT o.id, o.total_amount, u.email FROM sales.orders o JOIN users u ON u.id = o.user_id"
+    assert validate(sql, SCHEMA_QUALIFIED) == []
+
+
+def test_schema_qualified_table_columns_checked():
+    errors = validate("SELECT o.amount FROM sales.orders o", SCHEMA_QUALIFIED)
+    assert errors[0].startswith("존재하지 않는 컬럼: o.amount")
+
+
+def test_default_schema_prefix_resolves():
+    assert validate("SELECT email FROM public.users", SCHEMA_QUALIFIED) == []
+
+
+def test_unqualified_name_of_other_schema_table_reported():
+    errors = validate("SELECT id FROM orders", SCHEMA_QUALIFIED)
+    assert errors == ["존재하지 않는 테이블: orders (유사: sales.orders)"]
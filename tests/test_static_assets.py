@@ -0,0 +1,76 @@
+import os
+
+from fastapi import FastAPI, Request
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.testclient import TestClient
+
+from static_assets import StaticAssetCache, CachedPage
+
+
+def write(path, content, mtime):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.utime(path, (mtime, mtime))
+
+
+def make_page(tmp_path):
+    static_dir = tmp_path / "static"
+    static_dir.mkdir()
+    write(static_dir / "app.js", "console.log(1);", 1000)
+    page_path = tmp_path / "index.html"
+    write(page_path, '<script src="/static/app.js"></script>', 1000)
+    assets = StaticAssetCache(str(static_dir))
+    page = CachedPage(str(page_path), assets)
+    page.warm()
+    return page, static_dir
+
+
+def test_page_links_versioned_assets(tmp_path):
+    page, _ = make_page(tmp_path)
+    version = page.assets.get("app.js").version
+    assert f"/static/app.js?v={version}".encode() in page.body
+
+
+def test_page_rerendered_when_only_linked_asset_changes(tmp_path):
+    page, static_dir = make_page(tmp_path)
+    old_body, old_etag = page.body, page.etag
+
+    write(static_dir / "app.js", "console.log(2);", 2000)
+    page._load()
+
+    new_version = page.assets.get("app.js").version
+    assert page.body != old_body
+    assert page.etag != old_etag
+    assert f"/static/app.js?v={new_version}".encode() in page.body
+
+
+def test_page_not_rerendered_when_nothing_changes(tmp_path):
+    page, _ = make_page(tmp_path)
+    body = page.body
+    page._load()
+    assert page.body is body
+
+
+def test_page_precompressed_with_etag_per_encoding(tmp_path):
+    page, _ = make_page(tmp_path)
+    write(page.path, "<p>" + "index page " * 200 + "</p>", 3000)
+
+    app = FastAPI()
+    app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+    @app.get("/")
+    async def root(request: Request):
+        return page.response(request)
+
+    client = TestClient(app)
+    plain = client.get("/", headers={"Accept-Encoding": "identity"})
+    gzipped = client.get("/", headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in plain.headers
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert gzipped.content == plain.content
+    assert gzipped.headers["etag"] != plain.headers["etag"]
+    assert "Accept-Encoding" in gzipped.headers["vary"]
+
+    revalidated = client.get("/", headers={"Accept-Encoding": "gzip", "If-None-Match": gzipped.headers["etag"]})
+    assert revalidated.status_code == 304